@@ -0,0 +1,203 @@
+"""Benchmarks for rpgtools' hot paths.
+
+Run from the repository root:
+
+    python benchmarks/run.py                      # print timings
+    python benchmarks/run.py --save base.json     # store a baseline
+    python benchmarks/run.py --compare base.json  # flag regressions
+    python benchmarks/run.py -k gsys              # only matching benchmarks
+
+Each benchmark is timed over several repeats. In compare mode a benchmark is
+flagged when a Mann-Whitney U test finds it slower than the baseline at the
+given significance level and its median time grew by more than --threshold.
+The exit status is 1 if anything regressed.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rpgtools  # noqa: E402
+from rpgtools import dnd, gsys  # noqa: E402
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a function returning the callable to time."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+@benchmark("dnd.Roll()")
+def _():
+    return lambda: dnd.Roll(4, 6, 2)
+
+
+@benchmark("dnd.Roll.from_string simple")
+def _():
+    return lambda: dnd.Roll.from_string("3d6+2")
+
+
+@benchmark("dnd.Roll.from_string expression")
+def _():
+    return lambda: dnd.Roll.from_string("2d8+1d6kh1+4")
+
+
+def _gsys_pool(size):
+    letters = "papdbsp"
+    return "".join(letters[i % len(letters)] for i in range(size))
+
+
+for _size in (2, 4, 8, 12):
+    def _roll(pool=_gsys_pool(_size)):
+        return lambda: gsys.Roll(pool)
+
+    def _probability(pool=_gsys_pool(_size)):
+        # Clear the per-pool cache so every call does the full computation
+        def run():
+            gsys._pool_counts.cache_clear()
+            return gsys.Roll.probability(pool)
+        return run
+
+    benchmark(f"gsys.Roll {_size} dice")(_roll)
+    benchmark(f"gsys.Roll.probability {_size} dice")(_probability)
+
+
+def _big_table():
+    return rpgtools.Table({(i*5 + 1, i*5 + 5): f"result {i}"
+                           for i in range(10000)})
+
+
+@benchmark("Table.roll 10000 entries")
+def _():
+    return _big_table().roll
+
+
+@benchmark("Table.to_dict 10000 entries")
+def _():
+    return _big_table().to_dict
+
+
+@benchmark("Character()")
+def _():
+    return rpgtools.Character
+
+
+@benchmark("Character() x1000")
+def _():
+    return lambda: [rpgtools.Character() for i in range(1000)]
+
+
+@benchmark("Character.bulk(1000)")
+def _():
+    return lambda: rpgtools.Character.bulk(1000)
+
+
+@benchmark("DndCharacter()")
+def _():
+    return dnd.DndCharacter
+
+
+@benchmark("Adventure()")
+def _():
+    return lambda: rpgtools.Adventure(adv_type="goh")
+
+
+def measure(func, repeat, min_time=0.05):
+    """Return repeat per-call times in seconds."""
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    return [t/number for t in timer.repeat(repeat, number)]
+
+
+def mann_whitney(new, old):
+    """Return the one-sided p-value that new tends to be larger than old."""
+    ranked = sorted([(t, 0) for t in old] + [(t, 1) for t in new])
+    ranks = [0.0]*len(ranked)
+    i = 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j)/2 + 1
+        i = j + 1
+    (m, n) = (len(new), len(old))
+    u = sum(r for (r, (t, group)) in zip(ranks, ranked) if group) - m*(m + 1)/2
+    sigma = (m*n*(m + n + 1)/12)**0.5
+    if not sigma:
+        return 1.0
+    return 1 - statistics.NormalDist().cdf((u - m*n/2 - 0.5)/sigma)
+
+
+def run(pattern, repeat):
+    results = {}
+    for (name, setup) in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        samples = measure(setup(), repeat)
+        results[name] = samples
+        print(f"{name:40} {statistics.median(samples)*1e6:12.2f} us")
+    return results
+
+
+def compare(results, baseline, alpha, threshold):
+    regressed = []
+    print()
+    for (name, samples) in results.items():
+        if name not in baseline:
+            print(f"{name:40} {'(no baseline)':>12}")
+            continue
+        old = baseline[name]
+        change = statistics.median(samples)/statistics.median(old) - 1
+        p = mann_whitney(samples, old)
+        flag = ""
+        if p < alpha and change > threshold:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        print(f"{name:40} {change:+11.1%}  p={p:.3f}{flag}")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="pattern", default="",
+                        help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--save", metavar="PATH",
+                        help="write results to a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH",
+                        help="compare results against a JSON baseline")
+    parser.add_argument("--alpha", type=float, default=0.01,
+                        help="significance level for regressions")
+    parser.add_argument("--threshold", type=float, default=0.05,
+                        help="smallest slowdown worth flagging, e.g. 0.05")
+    args = parser.parse_args(argv)
+
+    results = run(args.pattern, args.repeat)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": platform.python_version(),
+                       "machine": platform.machine(),
+                       "results": results}, f, indent=4)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.alpha, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
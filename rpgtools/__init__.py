@@ -1,10 +1,70 @@
 """Container module for the rpgtools packages."""
 
-from random import choice, randint, sample
+from collections import deque, namedtuple
+from collections.abc import Mapping
+from functools import lru_cache, partial
+import marshal
+import random
 import os.path
 import json
 
 
+def _numpy(feature):
+    """Import numpy on first use; it's only needed for bulk methods."""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(f"{feature} requires numpy!") from None
+    return numpy
+
+
+class _GeneratorRandom(random.Random):
+    """Adapts a numpy Generator to the random.Random interface."""
+
+    def __init__(self, generator):
+        self.generator = generator
+        super().__init__()
+
+    def seed(self, *args, **kwargs):
+        pass
+
+    def random(self):
+        return self.generator.random()
+
+    def getrandbits(self, k):
+        if k == 0:
+            return 0
+        num = int.from_bytes(self.generator.bytes((k + 7) // 8), "little")
+        return num >> (-k % 8)
+
+
+def _as_random(rng=None):
+    """Return something with the random module's methods to draw from.
+
+    rng may be None (the random module's shared generator), a random.Random
+    or a numpy Generator."""
+    if rng is None:
+        return random
+    elif hasattr(rng, "bit_generator"):
+        return _GeneratorRandom(rng)
+    return rng
+
+
+def _as_generator(rng=None):
+    """Return a numpy Generator for rng, as accepted by _as_random()."""
+    np = _numpy("Bulk rolling")
+    if rng is None:
+        # Seed from the random module, so random.seed() makes bulk
+        # results reproducible too
+        rng = random
+    elif hasattr(rng, "bit_generator"):
+        return rng
+    elif isinstance(rng, _GeneratorRandom):
+        return rng.generator
+    # Seed from the Random so a seeded rng gives reproducible bulk results
+    return np.random.default_rng(rng.getrandbits(128))
+
+
 def _load_dict(filename):
     """Load a .json file from ./src/ and return it."""
     to_open = os.path.join(os.path.dirname(__file__), 'src', filename)
@@ -12,10 +72,147 @@ def _load_dict(filename):
         return json.load(f)
 
 
-# Preload json data to reduce resource use
-CHAR_DICT = _load_dict("char.json")
-ADV_DICT = _load_dict("adv.json")
+# --- Setting data ---
+# CHAR_DICT and ADV_DICT map setting (or adventure type) names to their data,
+# loading each one the first time it's read. Data comes from src/char.json and
+# src/adv.json, then from setting packs: directories laid out as
+#     <pack>/char/<setting>.json  ->  CHAR_DICT[setting]
+#     <pack>/adv/<adv_type>.json  ->  ADV_DICT[adv_type]
+# listed in $RPGTOOLS_SETTINGS (os.pathsep-separated) or passed to
+# add_setting_pack(). Later packs override earlier ones.
+#
+# Parsed data is marshalled per setting under $RPGTOOLS_CACHE (default
+# ~/.cache/rpgtools; set it empty to disable) and reused while the source
+# file's mtime and size are unchanged, so startup only reads what it uses.
+CACHE_DIR = os.environ.get("RPGTOOLS_CACHE",
+                           os.path.join(os.path.expanduser("~"), ".cache",
+                                        "rpgtools"))
+SETTING_PACKS = [path for path in
+                 os.environ.get("RPGTOOLS_SETTINGS", "").split(os.pathsep)
+                 if path]
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _cache_file(path, key):
+    """Return where to cache key from path (None for the whole file)."""
+    import hashlib
+    from urllib.parse import quote
+    folder = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+    name = "_file" if key is None else quote(key, safe="")
+    return os.path.join(CACHE_DIR, folder, name + ".marshal")
+
+
+def _read_cache(path, key):
+    """Return cached data for key in path, or None if missing or stale."""
+    if not CACHE_DIR:
+        return None
+    try:
+        with open(_cache_file(path, key), "rb") as f:
+            (stamp, data) = marshal.load(f)
+    except Exception:
+        # Missing, truncated, foreign or corrupt caches are all just misses
+        return None
+    return data if stamp == _stamp(path) else None
+
+
+def _write_cache(path, key, stamp, data):
+    if not CACHE_DIR:
+        return
+    to_write = _cache_file(path, key)
+    try:
+        os.makedirs(os.path.dirname(to_write), exist_ok=True)
+        # Write then rename so concurrent processes never see half a file
+        temp = f"{to_write}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            marshal.dump((stamp, data), f)
+        os.replace(temp, to_write)
+    except OSError:
+        pass
+
+
+def _load_file(path, split=False):
+    """Load a json file and refresh its cache.
+
+    With split=True the file holds several settings: each top-level key is
+    cached on its own, and the list of keys under "_keys"."""
+    stamp = _stamp(path)
+    with open(path, "r") as f:
+        data = json.load(f)
+    if split:
+        for (key, val) in data.items():
+            _write_cache(path, key, stamp, val)
+        _write_cache(path, "_keys", stamp, tuple(data))
+    else:
+        _write_cache(path, None, stamp, data)
+    return data
+
+
+class SettingData(Mapping):
+    """Read-only {setting: data} mapping which loads settings on first use."""
+
+    def __init__(self, filename, kind):
+        self.filename = filename
+        self.kind = kind
+        self.reload()
+
+    def reload(self):
+        """Forget loaded data and rediscover settings."""
+        self._sources = None
+        self._loaded = {}
+
+    def _index(self):
+        """Return {setting: (path, key in file or None)}."""
+        if self._sources is None:
+            sources = {}
+            path = os.path.join(os.path.dirname(__file__), "src", self.filename)
+            keys = _read_cache(path, "_keys")
+            if keys is None:
+                data = _load_file(path, split=True)
+                self._loaded.update(data)
+                keys = tuple(data)
+            for key in keys:
+                sources[key] = (path, key)
+            for pack in SETTING_PACKS:
+                folder = os.path.join(pack, self.kind)
+                if not os.path.isdir(folder):
+                    continue
+                for file_name in sorted(os.listdir(folder)):
+                    if file_name.endswith(".json"):
+                        sources[file_name[:-5]] = (os.path.join(folder,
+                                                                file_name),
+                                                   None)
+                        self._loaded.pop(file_name[:-5], None)
+            self._sources = sources
+        return self._sources
+
+    def __getitem__(self, setting):
+        sources = self._index()
+        if setting not in self._loaded:
+            (path, key) = sources[setting]
+            data = _read_cache(path, key)
+            if data is None:
+                data = _load_file(path, split=key is not None)
+                if key is not None:
+                    data = data[key]
+            self._loaded[setting] = data
+        return self._loaded[setting]
+
+    def __iter__(self):
+        return iter(self._index())
+
+    def __len__(self):
+        return len(self._index())
+
+
+CHAR_DICT = SettingData("char.json", "char")
+ADV_DICT = SettingData("adv.json", "adv")
 VERBOSE = False
+# Setting-level keys in CHAR_DICT which aren't races
+PERSONALITY = ("quirk", "strength", "flaw", "desire", "fear")
 
 
 # Simplify repeated calls for items in JSON dicts
@@ -34,11 +231,11 @@ def _extract(dict_, *args):
         return ['']
 
 
-def _extract_choice(dct, *args):
+def _extract_choice(dct, *args, rng=random):
     """Extract() a list and return a random.choice()"""
     lst = _extract(dct, *args)
     try:
-        return choice(lst)
+        return rng.choice(lst)
     except TypeError:
         if VERBOSE:
             print(f"extract_choice tried to choose from a {type(lst)}")
@@ -50,23 +247,247 @@ def _generate_name_from_list(list_):
     """Input format: 'x,' for choice of x or nul; 'x,y' for choice of x or y;
     'x,y,' for a choice of x or y or nul. Pass a list in the order of
     generation, choices from which will be concatenated."""
-    out = ""
-    # For each line of the generator file, append an option on that line to out
-    for string in list_:
-        out += choice(string.split(","))
-    return out.capitalize()
+    return NameGenerator(";".join(list_))()
 
 
 def _generate_name_from_json(*args):
     """Return generated name from char_dict using args as path to generator."""
-    inp = _extract(CHAR_DICT, *args)
-    # Generate from generator, pick from list
-    if isinstance(inp, str):
-        return _generate_name_from_list(inp.split(';'))
-    elif isinstance(inp, list):
-        return choice(inp)
+    return name_generator(*args)()
+
+
+class NameGenerator:
+    """Generates names from a char.json generator string or name list.
+
+    Generator strings are compiled once into a tuple of choices per part.
+    Call the generator for one name, use sample(k) for k names at once, or
+    distinct(n) for n names with no repeats."""
+
+    def __init__(self, inp):
+        if isinstance(inp, str):
+            self.grammar = tuple(tuple(part.split(",")) for part in inp.split(";"))
+            self.names = None
+        elif isinstance(inp, list) or isinstance(inp, tuple):
+            self.grammar = None
+            self.names = tuple(inp)
+        else:
+            raise TypeError(f'{type(inp)} is neither a string nor a list!')
+        # Repeated options only weight random choices; distinct() and size
+        # walk each option once
+        if self.grammar is not None:
+            self._unique = tuple(tuple(dict.fromkeys(opts))
+                                 for opts in self.grammar)
+        else:
+            self._unique = (tuple(dict.fromkeys(self.names)),)
+
+    def __call__(self, rng=random):
+        if self.names is not None:
+            return rng.choice(self.names)
+        return "".join([rng.choice(opts) for opts in self.grammar]).capitalize()
+
+    @property
+    def size(self):
+        """Return the number of ways to build a name.
+
+        Different combinations of parts occasionally spell the same name, so
+        this is an upper bound on the number of distinct names."""
+        out = 1
+        for opts in self._unique:
+            out *= len(opts)
+        return out
+
+    def sample(self, k, rng=random):
+        """Return k randomly generated names, which may repeat."""
+        if self.names is not None:
+            return rng.choices(self.names, k=k)
+        columns = [rng.choices(opts, k=k) for opts in self.grammar]
+        return ["".join(parts).capitalize() for parts in zip(*columns)]
+
+    def name_at(self, index):
+        """Return the name at index in the name space, 0 <= index < size."""
+        parts = []
+        for opts in reversed(self._unique):
+            (index, i) = divmod(index, len(opts))
+            parts.append(opts[i])
+        name = "".join(reversed(parts))
+        # List names are returned as written, like __call__() and sample()
+        return name.capitalize() if self.grammar is not None else name
+
+    def distinct(self, n=None, rng=None):
+        """Yield n different names in random order, or all of them if n is None.
+
+        Walks a lazily shuffled permutation of the name space, so each name
+        costs O(1) however full the space gets. Stops early if the space
+        holds fewer than n distinct names."""
+        rng = _as_random(rng)
+        seen = set()
+        size = self.size
+        # Sparse Fisher-Yates: only positions which have been swapped are stored
+        swapped = {}
+        for i in range(size):
+            if n is not None and len(seen) >= n:
+                return
+            j = rng.randrange(i, size)
+            index = swapped.get(j, j)
+            swapped[j] = swapped.pop(i, i)
+            name = self.name_at(index)
+            if name not in seen:
+                seen.add(name)
+                yield name
+
+
+@lru_cache(maxsize=None)
+def name_generator(*args):
+    """Return the cached NameGenerator at CHAR_DICT[arg 1][arg 2]...[arg n]."""
+    return NameGenerator(_extract(CHAR_DICT, *args))
+
+
+def _pool(*args):
+    """Return CHAR_DICT[arg 1]...[arg n] as a tuple to choose() from."""
+    lst = _extract(CHAR_DICT, *args)
+    if isinstance(lst, (list, tuple, str)):
+        return tuple(lst)
+    if VERBOSE:
+        print(f"_pool tried to choose from a {type(lst)}")
+    return ('',)
+
+
+@lru_cache(maxsize=None)
+def _races(setting):
+    """Return the races available in a setting."""
+    return tuple(race for race in CHAR_DICT[setting] if race not in PERSONALITY)
+
+
+# Everything needed to generate characters of one setting, race and gender,
+# resolved from CHAR_DICT once by _character_plan()
+_Plan = namedtuple("_Plan", ("name", "surname", "agerange", "personality"))
+
+
+@lru_cache(maxsize=None)
+def _character_plan(setting, race, gender):
+    return _Plan(
+        name=name_generator(setting, race, gender),
+        surname=name_generator(setting, race, "surnames"),
+        agerange=tuple(_extract(CHAR_DICT, setting, race, "agerange")),
+        personality=tuple((trait, _pool(setting, trait))
+                          for trait in PERSONALITY))
+
+
+def add_setting_pack(path):
+    """Make the settings in a setting pack directory available."""
+    SETTING_PACKS.append(path)
+    _reload_settings()
+
+
+def remove_setting_pack(path):
+    """Stop using a setting pack added with add_setting_pack()."""
+    SETTING_PACKS.remove(path)
+    _reload_settings()
+
+
+def _reload_settings():
+    CHAR_DICT.reload()
+    ADV_DICT.reload()
+    for cached in (name_generator, _races, _character_plan):
+        cached.cache_clear()
+
+
+# --- Reproducible batch generation ---
+def _item_seed(seed, index):
+    """Derive an independent 64-bit seed for item index of a seeded batch."""
+    import hashlib
+    digest = hashlib.blake2b(f"{seed}:{index}".encode(), digest_size=8)
+    return int.from_bytes(digest.digest(), "big")
+
+
+def _generate_chunk(cls, seeds, kwargs):
+    """Build one cls(**kwargs) per seed, each with its own seeded Random.
+
+    Runs in worker processes, so it must stay at module level."""
+    return [cls(rng=random.Random(item_seed), **kwargs) for item_seed in seeds]
+
+
+def _generate_many(cls, n, workers, seed, kwargs, chunk_size=64):
+    """Yield n instances of cls in order, generated across worker processes.
+
+    Every item gets its own seed derived from (seed, index), so the output is
+    identical for a given seed whatever the number of workers. Only a few
+    chunks per worker are in flight at once, keeping memory bounded."""
+    if seed is None:
+        seed = random.getrandbits(64)
+    chunks = (tuple(_item_seed(seed, i)
+                    for i in range(start, min(start + chunk_size, n)))
+              for start in range(0, n, chunk_size))
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _generate_chunk(cls, chunk, kwargs)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_generate_chunk, cls, chunk, kwargs))
+            if len(pending) >= 2*workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+_BULK_ATTRS = ("setting", "race", "gender", "name", "surname", "age",
+               "personality")
+# One (setting, race, gender) group drawn by _bulk_groups(): indices are
+# the group's positions among all n characters, personality holds one
+# column per trait in traits
+_BulkGroup = namedtuple("_BulkGroup", ("key", "indices", "names", "surnames",
+                                       "ages", "traits", "personality"))
+
+
+def _bulk_groups(n, rng, fixed):
+    """Draw the attributes of n characters column by column, as bulk() does.
+
+    Yields a _BulkGroup per (setting, race, gender) so callers can build
+    objects or store the columns directly."""
+    if "setting" in fixed:
+        settings = [fixed["setting"]]*n
+    else:
+        settings = rng.choices(tuple(CHAR_DICT), k=n)
+    if "race" in fixed:
+        races = [fixed["race"]]*n
     else:
-        raise TypeError(f'{type(inp)} is neither a string nor a list!')
+        races = [None]*n
+        by_setting = {}
+        for (i, setting) in enumerate(settings):
+            by_setting.setdefault(setting, []).append(i)
+        for (setting, indices) in by_setting.items():
+            for (i, race) in zip(indices,
+                                 rng.choices(_races(setting),
+                                             k=len(indices))):
+                races[i] = race
+    if "gender" in fixed:
+        genders = [fixed["gender"]]*n
+    else:
+        genders = rng.choices(("male", "female"), k=n)
+
+    groups = {}
+    for (i, key) in enumerate(zip(settings, races, genders)):
+        groups.setdefault(key, []).append(i)
+    for (key, indices) in groups.items():
+        k = len(indices)
+        plan = _character_plan(*key)
+        names = ([fixed["name"]]*k if "name" in fixed
+                 else plan.name.sample(k, rng))
+        surnames = ([fixed["surname"]]*k if "surname" in fixed
+                    else plan.surname.sample(k, rng))
+        ages = ([fixed["age"]]*k if "age" in fixed
+                else rng.choices(range(plan.agerange[0],
+                                       plan.agerange[1] + 1), k=k))
+        if "personality" in fixed:
+            traits = tuple(fixed["personality"])
+            columns = [[fixed["personality"][trait]]*k for trait in traits]
+        else:
+            traits = tuple(trait for (trait, pool) in plan.personality)
+            columns = [rng.choices(pool, k=k)
+                       for (trait, pool) in plan.personality]
+        yield _BulkGroup(key, indices, names, surnames, ages, traits, columns)
 
 
 class Character:
@@ -79,9 +500,13 @@ class Character:
         * name: (string)
         * surname: (string)
         * age: (int)
-        * personality: (dict)"""
+        * personality: (dict)
+
+    Pass rng (a random.Random or numpy Generator) to draw from it instead of
+    the random module."""
 
-    def __init__(self, **kwargs):
+    def __init__(self, rng=None, **kwargs):
+        rng = _as_random(rng)
         for item in ("setting",
                      "race",
                      "gender",
@@ -89,47 +514,117 @@ class Character:
                      "surname",
                      "age",
                      "personality"):
-            self.__dict__[item] = self._choose(item, kwargs)
+            self.__dict__[item] = self._choose(item, kwargs, rng)
 
     def __str__(self):
         out = [f"{str(key).rjust(10, ' ')}: {str(val)}"
-               for (key, val) in self.__dict__.items()]
+               for (key, val) in self._attrs().items()]
         return "\n".join(out)
 
+    def _attrs(self):
+        """Return the attributes which are printed and saved."""
+        return {key: val for (key, val) in self.__dict__.items()
+                if not key.startswith("_")}
+
     # --- Randomization for unspecified characteristics ---
-    def _choose(self, item, args):
+    def _choose(self, item, args, rng=random):
         if item in args:
             return args[item]
         else:
             if item == "setting":
-                return choice(list(CHAR_DICT))
+                return rng.choice(tuple(CHAR_DICT))
             elif item == "race":
-                races = [race for race in list(CHAR_DICT[self.setting])
-                         if race not in
-                         ("quirk", "strength", "flaw", "desire", "fear")]
-                return choice(races)
+                return rng.choice(_races(self.setting))
             elif item == "gender":
-                return choice(("male", "female"))
-            elif item == "name":
-                new_args = (self.setting, self.race, self.gender)
-                return _generate_name_from_json(*new_args)
+                return rng.choice(("male", "female"))
+            plan = _character_plan(self.setting, self.race, self.gender)
+            if item == "name":
+                return plan.name(rng)
             elif item == "surname":
-                new_args = (self.setting, self.race, "surnames")
-                return _generate_name_from_json(*new_args)
+                return plan.surname(rng)
             elif item == "age":
-                r = _extract(CHAR_DICT, self.setting, self.race, 'agerange')
-                return randint(*r)
+                return rng.randint(*plan.agerange)
             elif item == "personality":
-                dct = {}
-                for item in ('quirk', 'strength', 'flaw', 'desire', 'fear'):
-                    dct[item] = _extract_choice(CHAR_DICT, self.setting, item)
-                return dct
+                return {trait: rng.choice(pool)
+                        for (trait, pool) in plan.personality}
+
+    @classmethod
+    def bulk(cls, n, rng=None, **fixed):
+        """Return a list of n characters, fixing any attributes passed.
+
+        Characters are grouped by (setting, race, gender), whose generation
+        data is resolved once, and each group's attributes are drawn
+        together. That makes it about 4x faster than calling the class n
+        times; most of the remaining time goes to allocating each
+        character's attribute and personality dicts."""
+        rng = _as_random(rng)
+        extra = {key: val for (key, val) in fixed.items()
+                 if key not in _BULK_ATTRS}
+        extra["rng"] = rng
+        columns = cls._bulk_columns(n, rng, fixed)
+        out = [None]*n
+        for group in _bulk_groups(n, rng, fixed):
+            (setting, race, gender) = group.key
+            if group.traits:
+                personalities = list(map(dict, map(partial(zip, group.traits),
+                                                   zip(*group.personality))))
+            else:
+                personalities = [{} for i in group.indices]
+            build = cls._from_attrs
+            for (i, name, surname, age, personality) in zip(
+                    group.indices, group.names, group.surnames,
+                    group.ages, personalities):
+                attrs = {"setting": setting,
+                         "race": race,
+                         "gender": gender,
+                         "name": name,
+                         "surname": surname,
+                         "age": age,
+                         "personality": personality}
+                for (attr, column) in columns.items():
+                    attrs[attr] = column[i]
+                out[i] = build(attrs, extra)
+        return out
+
+    @classmethod
+    def _bulk_columns(cls, n, rng, fixed):
+        """Return {attribute: n values} for subclass attributes which bulk()
+        should draw all at once and pass to _from_attrs()."""
+        return {}
+
+    @classmethod
+    def _from_attrs(cls, attrs, extra):
+        """Build an instance from fully generated attributes for bulk()."""
+        obj = cls.__new__(cls)
+        obj.__dict__ = attrs
+        return obj
+
+    @classmethod
+    def generate_many(cls, n, workers=1, seed=None, **kwargs):
+        """Return n characters generated by up to workers processes.
+
+        With a seed the result is the same however many workers are used.
+        Any other arguments are passed to every character."""
+        return list(cls.iter_many(n, workers, seed, **kwargs))
+
+    @classmethod
+    def iter_many(cls, n, workers=1, seed=None, **kwargs):
+        """Like generate_many(), but yield characters as they're ready."""
+        return _generate_many(cls, n, workers, seed, kwargs)
+
+    def file_name(self):
+        """Return the file name save() uses."""
+        return (self.name + self.surname).lower() + ".json"
+
+    def dump(self, f):
+        """Write the character's JSON to a text file object."""
+        json.dump(self._attrs(), f, indent=4, separators=(",", ": "))
 
     def save(self, _path=""):
         """Save character to json file."""
-        file_name = (self.name + self.surname).lower() + ".json"
+        file_name = self.file_name()
         with open(os.path.join(_path, file_name), "w") as f:
-            json.dump(self.__dict__, f, indent=4, separators=(",", ": "))
+            self.dump(f)
         return os.path.join(_path, file_name)
 
     @classmethod
@@ -153,11 +648,14 @@ class Adventure:
         hours: (overall description of an hour's plot * num_hours)
         story_atoms: ((element * num_elements) * num_hours)
         quest_giver: Character object
-        title: string"""
+        title: string
+        rng: random.Random or numpy Generator to draw from instead of the
+            random module"""
 
     # Required stuff: adventure type, num_hours, num_elements,
     # locale, sub_locale, plot, objective, (hours), quest_giver, (story_atoms)
-    def __init__(self, **kwargs):
+    def __init__(self, rng=None, **kwargs):
+        rng = _as_random(rng)
         for item in ("adv_type",
                      "num_hours",
                      "num_elements",
@@ -169,130 +667,281 @@ class Adventure:
                      "story_atoms",
                      "quest_giver",
                      "title"):
-            self.__dict__[item] = self._choose(item, kwargs)
+            self.__dict__[item] = self._choose(item, kwargs, rng)
 
     def __str__(self):
-        out = (f"\n{self.title}"
+        return "".join(self._text_parts())
+
+    def _text_parts(self):
+        yield (f"\n{self.title}"
                + f"\nIn {self.locale}, in {self.sub_locale};"
                + f"\nA {self.plot}, to {self.objective}."
                + "\n\nGiven by:"
                + f"\n{self.quest_giver}\n")
         for i in range(len(self.hours)):
-            out += f"\nIn hour {i + 1}, {self.hours[i]}:"
+            yield f"\nIn hour {i + 1}, {self.hours[i]}:"
             for j in range(self.num_elements):
-                out += f"\n    {j + 1}. {self.story_atoms[i][j]}"
+                yield f"\n    {j + 1}. {self.story_atoms[i][j]}"
+
+    def _attrs(self):
+        """Return the adventure as JSON-ready data, quest giver included."""
+        out = dict(self.__dict__)
+        out["quest_giver"] = self.quest_giver._attrs()
         return out
 
-    def _extr_adv(self, elem):
+    def _extr_adv(self, elem, rng=random):
         """Extract adventure element from ADV_DICT[adv_type]."""
-        return _extract_choice(ADV_DICT, self.adv_type, elem)
+        return _extract_choice(ADV_DICT, self.adv_type, elem, rng=rng)
 
-    def _choose(self, item, args):
+    def _choose(self, item, args, rng=random):
 
         if item in args:
             return args[item]
         else:
             if item == "adv_type":
-                return choice(list(ADV_DICT))
+                # Only types with enough hours and story elements to fill
+                # the adventure can be generated. Drawing types until one
+                # fits picks evenly among those that do, and only loads the
+                # types it draws
+                (hours, elements) = (args.get("num_hours", 3),
+                                     args.get("num_elements", 5))
+                types = list(ADV_DICT)
+                while types:
+                    adv_type = types.pop(rng.randrange(len(types)))
+                    if (len(_extract(ADV_DICT, adv_type, "hours")) >= hours
+                            and len(_extract(ADV_DICT, adv_type,
+                                             "story_elements")) >= elements):
+                        return adv_type
+                raise ValueError(f"No adventure type has {hours} hours "
+                                 + f"of {elements} elements!")
             elif item == "num_hours":
                 return 3
             elif item == "num_elements":
                 return 5
             elif item == "locale":
-                return self._extr_adv('locales')
+                return self._extr_adv('locales', rng)
             elif item == "sub_locale":
-                return self._extr_adv('sub_locales')
+                return self._extr_adv('sub_locales', rng)
             elif item == "plot":
-                return self._extr_adv('plots')
+                return self._extr_adv('plots', rng)
             elif item == "objective":
-                return self._extr_adv('objectives')
+                return self._extr_adv('objectives', rng)
             elif item == "hours":
-                return sample(_extract(ADV_DICT, self.adv_type, 'hours'),
-                              self.num_hours)
+                hours = _extract(ADV_DICT, self.adv_type, 'hours')
+                if len(hours) < self.num_hours:
+                    raise ValueError(f"{self.adv_type} adventures don't have "
+                                     + f"{self.num_hours} hours!")
+                return rng.sample(hours, self.num_hours)
             elif item == "quest_giver":
-                return Character()
+                return Character(rng=rng)
             elif item == "story_atoms":
                 story_elements = _extract(ADV_DICT, self.adv_type,
                                           'story_elements')
+                if len(story_elements) < self.num_elements:
+                    raise ValueError(f"{self.adv_type} adventures don't have "
+                                     + f"{self.num_elements} elements per hour!")
                 out = []
                 for i in range(self.num_hours):
-                    elems = sample(story_elements, self.num_elements)
+                    elems = rng.sample(story_elements, self.num_elements)
                     out.append(elems)
                 return out
             elif item == "title":
                 out = (
                    "THE "
-                   + _extract_choice(ADV_DICT, self.adv_type, 'title_elements')
+                   + _extract_choice(ADV_DICT, self.adv_type, 'title_elements',
+                                     rng=rng)
                    + " OF "
                    + self.locale
                 )
                 return out.upper()
 
+    @classmethod
+    def generate_many(cls, n, workers=1, seed=None, **kwargs):
+        """Return n adventures generated by up to workers processes.
+
+        With a seed the result is the same however many workers are used.
+        Any other arguments are passed to every adventure."""
+        return list(cls.iter_many(n, workers, seed, **kwargs))
+
+    @classmethod
+    def iter_many(cls, n, workers=1, seed=None, **kwargs):
+        """Like generate_many(), but yield adventures as they're ready."""
+        return _generate_many(cls, n, workers, seed, kwargs)
+
     def build_quest_giver(self, **kwargs):
         self.quest_giver = Character(**kwargs)
 
     def markdown(self):
+        return "".join(self._markdown_parts())
+
+    def _markdown_parts(self, qg_file=None):
+        """Yield the markdown, linking the quest giver to qg_file (by
+        default the file save() writes them to)."""
         qg = self.quest_giver
-        qg_file = qg.name + qg.surname + ".json"
-        qg_file = qg_file.lower()
-        out = (f"## {self.title} ##"
+        if qg_file is None:
+            qg_file = qg.file_name()
+        yield (f"## {self.title} ##"
                + f"\nIn {self.locale}, in {self.sub_locale};"
                + f" a {self.plot}, to {self.objective}."
                + "\n\nGiven by: "
                + f"[{qg.name} {qg.surname}](./{qg_file}), "
                + f"{qg.race} {qg.gender}.")
         for i in range(len(self.hours)):
-            out += f"\n\nIn hour {i + 1}, {self.hours[i]}:\n"
+            yield f"\n\nIn hour {i + 1}, {self.hours[i]}:\n"
             for j in range(self.num_elements):
-                out += f"\n{j + 1}. {self.story_atoms[i][j]}"
-        return out
-
-    def write(self, _path="", file_format="text"):
-        """Write details to a file named after the title."""
-        file_name = self.title.replace(" ", "").lower()
-        output = ""
+                yield f"\n{j + 1}. {self.story_atoms[i][j]}"
 
+    def render(self, f, file_format="text"):
+        """Write the text or markdown piece by piece to a text file object."""
         if file_format == "text":
-            output = str(self)
-            file_name += ".txt"
+            f.writelines(self._text_parts())
         elif file_format == "markdown":
-            output = self.markdown()
-            file_name += ".md"
+            f.writelines(self._markdown_parts())
+        else:
+            raise ValueError(f"Unknown file format {file_format}!")
+
+    def file_name(self, file_format="text"):
+        """Return the file name write() uses."""
+        return (self.title.replace(" ", "").lower()
+                + (".md" if file_format == "markdown" else ".txt"))
+
+    def write(self, _path="", file_format="text"):
+        """Write details to a file named after the title."""
+        if file_format not in ("text", "markdown"):
+            raise ValueError(f"Unknown file format {file_format}!")
+        if file_format == "markdown":
             self.quest_giver.save(_path)
 
-        to_save = os.path.join(_path, file_name)
+        to_save = os.path.join(_path, self.file_name(file_format))
         # Verify file doesn't already exist
         if not os.path.isfile(to_save):
             with open(to_save, "w") as f:
-                f.write(output)
+                self.render(f, file_format)
             print("Wrote to " + to_save)
         else:
             print(f"A file exists at {to_save}!")
 
+    @staticmethod
+    def write_many(adventures, target, file_format="text"):
+        """Stream an iterable of adventures into one file and return how many
+        were written.
 
-# NOTES ON TABLE
-# A faster implementation would have a dict backing and would test table place-
-# ment via the following:
-# Convert {1: a, (2,5): b, 6:c} to [(1, a), (2, b), (5, b), (6, c)]
-# Gen random integer 0 < i <= bound
-# sort list_of_tups by tup[0]
-# for item in list_of_tups, if i <= item[0] { return item[1] }
-#
-# This would scale with number of boundary points and not number of integers
-# and thus allow for arbitrarily-sized tables within the limits of int
-# randomization
+        target may be a text file object or a path. Paths ending in ".zip"
+        get one member per adventure, plus each quest giver's JSON for
+        markdown; anything else gets one document with the adventures
+        separated by blank lines. Adventures are rendered one at a time, so
+        a generator such as iter_many() never has to fit in memory."""
+        if file_format not in ("text", "markdown"):
+            raise ValueError(f"Unknown file format {file_format}!")
+        if not hasattr(target, "write") and str(target).endswith(".zip"):
+            return _write_archive(adventures, target, file_format)
+        if hasattr(target, "write"):
+            return _write_document(adventures, target, file_format)
+        with open(target, "w", encoding="utf-8") as f:
+            return _write_document(adventures, f, file_format)
+
+
+def _write_document(adventures, f, file_format):
+    count = 0
+    for adventure in adventures:
+        if count:
+            f.write("\n\n")
+        adventure.render(f, file_format)
+        count += 1
+    f.write("\n")
+    return count
+
+
+def _write_archive(adventures, path, file_format):
+    import io
+    import zipfile
+    count = 0
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for adventure in adventures:
+            # Titles and quest givers' names repeat, so number the members
+            # to keep them apart
+            name = f"{count:06d}-{adventure.file_name(file_format)}"
+            if file_format == "markdown":
+                qg_file = f"{count:06d}-{adventure.quest_giver.file_name()}"
+                with io.TextIOWrapper(archive.open(qg_file, "w"),
+                                      encoding="utf-8") as f:
+                    adventure.quest_giver.dump(f)
+                with io.TextIOWrapper(archive.open(name, "w"),
+                                      encoding="utf-8") as f:
+                    f.writelines(adventure._markdown_parts(qg_file))
+            else:
+                with io.TextIOWrapper(archive.open(name, "w"),
+                                      encoding="utf-8") as f:
+                    adventure.render(f, file_format)
+            count += 1
+    return count
+
+
+# Tables store one entry per run of identical results rather than one per
+# integer: {1: a, (2,5): b, 6: c} becomes bounds [1, 5, 6] and values
+# [a, b, c]. Memory then scales with the number of entries, so arbitrarily
+# large dice are fine. Rolls use an alias table built over those entries
+# (Vose's method, in integers so the odds stay exact) and cost O(1).
 class Table:
-    """Rolls on a table and returns a result."""
+    """Rolls on a table and returns a result.
 
-    def __init__(self, data):
+    Pass rng (a random.Random or numpy Generator) to roll with it instead of
+    the random module."""
+
+    def __init__(self, data, rng=None):
+        self._rng = rng
+        self._random = _as_random(rng)
+        self._bounds = []
+        self._values = []
         if isinstance(data, tuple) or isinstance(data, list):
-            self._raw = list(data)
+            for item in data:
+                self._append(item, 1)
         elif isinstance(data, dict):
-            self._raw = Table.list_from_dict(data)
+            for (key, value) in data.items():
+                if isinstance(key, tuple):
+                    self._append(value, key[1] - key[0] + 1)
+                else:
+                    self._append(value, 1)
 
-        if len(self._raw) < 2:
+        if len(self) < 2:
             raise ValueError("Tables must have at least two options!"
-                             + f" Options given: {len(self._raw)}")
+                             + f" Options given: {len(self)}")
+        self._build_alias()
+        self._arrays = None
+
+    def _build_alias(self):
+        """Build the alias table used by roll() and roll_many()."""
+        total = len(self)
+        widths = [b - a for (a, b) in zip([0] + self._bounds, self._bounds)]
+        num = len(widths)
+        # Entry i is kept if randrange(total) < prob[i], else alias[i] is used
+        scaled = [w*num for w in widths]
+        prob = [total]*num
+        alias = list(range(num))
+        small = [i for i in range(num) if scaled[i] < total]
+        large = [i for i in range(num) if scaled[i] >= total]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] -= total - scaled[less]
+            if scaled[more] < total:
+                small.append(more)
+            else:
+                large.append(more)
+        self._prob = prob
+        self._alias = alias
+
+    def _append(self, value, width):
+        """Add width rows of value to the end of the table."""
+        if width < 1:
+            return
+        total = len(self)
+        if self._values and self._values[-1] == value:
+            self._bounds[-1] = total + width
+        else:
+            self._bounds.append(total + width)
+            self._values.append(value)
 
     def __str__(self):
         out = f"TABLE: Roll 1d{self.die_size()}. "
@@ -305,26 +954,57 @@ class Table:
         return out
 
     def __len__(self):
-        return len(self._raw)
+        return self._bounds[-1] if self._bounds else 0
 
     def roll(self):
         """Return a result roll on the table."""
-        return choice(self._raw)
+        i = self._random.randrange(len(self._values))
+        if self._random.randrange(len(self)) >= self._prob[i]:
+            i = self._alias[i]
+        return self._values[i]
+
+    def roll_many(self, n, counts=False):
+        """Roll n times at once and return a numpy array of results.
+
+        With counts=True, return {result: times rolled} instead. Requires
+        numpy."""
+        np = _numpy("Table.roll_many()")
+        if self._arrays is None:
+            values = np.empty(len(self._values), dtype=object)
+            values[:] = self._values
+            self._arrays = (np.array(self._prob), np.array(self._alias), values)
+        (prob, alias, values) = self._arrays
+        rng = _as_generator(self._rng)
+        picks = rng.integers(len(values), size=n)
+        kept = rng.integers(len(self), size=n) < prob[picks]
+        picks = np.where(kept, picks, alias[picks])
+        if not counts:
+            return values[picks]
+        out = {}
+        for (value, times) in zip(self._values,
+                                  np.bincount(picks, minlength=len(values))):
+            if times:
+                out[value] = out.get(value, 0) + int(times)
+        return out
 
     def to_tuple(self):
-        return tuple(self._raw)
+        return tuple(self.to_list())
 
     def to_list(self):
-        return self._raw
+        out = []
+        start = 0
+        for (bound, value) in zip(self._bounds, self._values):
+            out.extend([value]*(bound - start))
+            start = bound
+        return out
 
     def to_dict(self):
-        raw = self._raw
+        # Total up rows per result, in order of first appearance
         temp = {}
-        for i in range(0, len(raw)):
-            if raw[i] in temp:
-                temp[raw[i]] += 1
-            else:
-                temp[raw[i]] = 1
+        start = 0
+        for (bound, value) in zip(self._bounds, self._values):
+            temp[value] = temp.get(value, 0) + bound - start
+            start = bound
         # {"red": 2, "heck": 1}
         index = 1
         out = {}
@@ -354,9 +1034,13 @@ class Table:
         _list = []
         for key in _dict:
             if isinstance(key, tuple):
-                # e.g. (2,5) -> range(2,6) so that 2, 3, 4, 5 are in the range
-                for i in range(key[0], key[1]+1):
-                    _list.append(_dict[key])
+                # e.g. (2,5) -> 2, 3, 4, 5 are all in the range
+                _list.extend([_dict[key]]*(key[1] - key[0] + 1))
             else:
                 _list.append(_dict[key])
         return _list
+
+
+if os.environ.get("RPGTOOLS_INSTRUMENT"):
+    from rpgtools import instrument
+    instrument._start_from_env(os.environ["RPGTOOLS_INSTRUMENT"])
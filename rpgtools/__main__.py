@@ -0,0 +1,5 @@
+import sys
+
+from rpgtools.cli import main
+
+sys.exit(main())
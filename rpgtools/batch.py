@@ -0,0 +1,292 @@
+"""Compact column storage for large numbers of characters.
+
+A CharacterBatch holds characters as columns instead of one object (and a
+handful of dicts) each. Text attributes are coded against each column's
+list of distinct values, so a name or a fear string is stored once however
+many characters share it. Ages, D&D stats, levels and proficiencies live in
+fixed-width arrays, and mods, prof_mod and skill_mods aren't stored at all
+since DndCharacter derives them.
+
+    batch = CharacterBatch.bulk(1000000)
+    batch[42]              # a real Character, so str() and save() still work
+    batch = CharacterBatch.from_characters(party)
+    party = batch.to_list()
+"""
+
+from array import array
+from itertools import chain
+
+import rpgtools
+from rpgtools import Character, _as_random
+from rpgtools.dnd import SKILLS, STATS, DndCharacter
+
+# Attributes stored in the core text columns, in __dict__ order
+CORE = ("setting", "race", "gender", "name", "surname")
+# DndCharacter attributes rebuilt from the others rather than stored
+DERIVED = ("mods", "skill_mods", "prof_mod")
+# Proficiencies are packed into one integer, PROF_BITS bits per skill
+PROF_BITS = 5
+_SKILL_NAMES = tuple(SKILLS)
+_SKILL_CODES = {skill: i + 1 for (i, skill) in enumerate(_SKILL_NAMES)}
+
+
+class _Column:
+    """Values stored as codes into a list of distinct values.
+
+    Code 0 is always None, so rows from before a column existed read as
+    missing."""
+
+    def __init__(self, size=0):
+        self.values = [None]
+        self.codes = array("I", bytes(4*size))
+        self._lookup = {None: 0}
+
+    def code(self, value):
+        """Return value's code, adding it if it's new."""
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def find(self, value):
+        """Return value's code, or None if no row has it."""
+        return self._lookup.get(value)
+
+    def append(self, value):
+        self.codes.append(self.code(value))
+
+    def __getitem__(self, row):
+        return self.values[self.codes[row]]
+
+    def __iter__(self):
+        values = self.values
+        return (values[code] for code in self.codes)
+
+
+def _pack_proficiencies(skills):
+    packed = 0
+    for (i, skill) in enumerate(skills):
+        if skill not in _SKILL_CODES:
+            raise ValueError(f"{skill} isn't a skill CharacterBatch can store!")
+        packed |= _SKILL_CODES[skill] << PROF_BITS*i
+    if packed >= 1 << 64:
+        raise ValueError(f"CharacterBatch can't store {len(skills)} proficiencies!")
+    return packed
+
+
+def _unpack_proficiencies(packed):
+    skills = []
+    while packed:
+        skills.append(_SKILL_NAMES[(packed & (1 << PROF_BITS) - 1) - 1])
+        packed >>= PROF_BITS
+    return skills
+
+
+class CharacterBatch:
+    """Characters of class cls stored by column.
+
+    Indexing builds a real cls instance, so its __str__ and save() behave
+    exactly as the original character's did. Attributes other than the
+    usual ones (e.g. a town's professions) are kept in extra columns and
+    set on the instances built."""
+
+    def __init__(self, cls=Character):
+        self.cls = cls
+        self._dnd = issubclass(cls, DndCharacter)
+        self._size = 0
+        self._core = {attr: _Column() for attr in CORE}
+        self._ages = array("H")
+        self._traits = {}
+        self._extras = {}
+        if self._dnd:
+            self._stats = array("b")
+            self._levels = array("H")
+            self._classes = _Column()
+            self._proficiencies = array("Q")
+
+    @classmethod
+    def bulk(cls, n, character_cls=Character, rng=None, **fixed):
+        """Generate n characters straight into a batch, as
+        character_cls.bulk() would.
+
+        Plain Characters are drawn column by column and never built as
+        objects; other classes are built and stored a chunk at a time."""
+        rng = _as_random(rng)
+        batch = cls(character_cls)
+        if character_cls is not Character:
+            for start in range(0, n, 4096):
+                batch.extend(character_cls.bulk(min(4096, n - start),
+                                                rng=rng, **fixed))
+            return batch
+
+        batch._size = n
+        batch._core = {attr: _Column(n) for attr in CORE}
+        batch._ages = array("H", bytes(2*n))
+        for group in rpgtools._bulk_groups(n, rng, fixed):
+            for (attr, value) in zip(("setting", "race", "gender"), group.key):
+                column = batch._core[attr]
+                code = column.code(value)
+                for i in group.indices:
+                    column.codes[i] = code
+            columns = [(batch._core["name"], group.names),
+                       (batch._core["surname"], group.surnames)]
+            columns += [(batch._trait(trait), values) for (trait, values)
+                        in zip(group.traits, group.personality)]
+            for (column, values) in columns:
+                codes = column.codes
+                for (i, value) in zip(group.indices, values):
+                    codes[i] = column.code(value)
+            for (i, age) in zip(group.indices, group.ages):
+                batch._ages[i] = age
+        return batch
+
+    @classmethod
+    def from_characters(cls, characters, character_cls=None):
+        """Return a batch holding characters, of the first one's class
+        unless character_cls is given."""
+        characters = iter(characters)
+        first = next(characters, None)
+        if character_cls is None:
+            character_cls = Character if first is None else type(first)
+        batch = cls(character_cls)
+        if first is not None:
+            batch.append(first)
+            batch.extend(characters)
+        return batch
+
+    def _trait(self, trait):
+        if trait not in self._traits:
+            self._traits[trait] = _Column(self._size)
+        return self._traits[trait]
+
+    def _extra(self, attr):
+        if attr not in self._extras:
+            self._extras[attr] = _Column(self._size)
+        return self._extras[attr]
+
+    def append(self, character):
+        """Store a copy of character's attributes.
+
+        The whole row is checked before anything is stored, so a rejected
+        character leaves the batch as it was."""
+        if type(character) is not self.cls:
+            raise TypeError(f"Can't add a {type(character).__name__} to a "
+                            + f"batch of {self.cls.__name__}!")
+        attrs = character._attrs()
+        personality = attrs["personality"]
+        skip = set(CORE) | {"age", "personality"}
+        if self._dnd:
+            stats = attrs["stats"]
+            if list(stats) != list(STATS):
+                raise ValueError("CharacterBatch needs every stat in STATS order!")
+            stats = array("b", stats.values())
+            level = array("H", [attrs["level"]])
+            proficiencies = _pack_proficiencies(attrs["proficiencies"])
+            skip |= {"stats", "level", "dnd_class", "proficiencies"}
+            skip |= set(DERIVED)
+        age = array("H", [attrs["age"]])
+        extras = {attr: val for (attr, val) in attrs.items() if attr not in skip}
+        coded = CORE + ("dnd_class",) if self._dnd else CORE
+        for (attr, val) in chain(((attr, attrs[attr]) for attr in coded),
+                                 personality.items(), extras.items()):
+            try:
+                hash(val)
+            except TypeError:
+                raise TypeError(f"CharacterBatch can't store {attr}, "
+                                + f"a {type(val).__name__}!") from None
+
+        for attr in CORE:
+            self._core[attr].append(attrs[attr])
+        self._ages.extend(age)
+        for trait in personality:
+            self._trait(trait)
+        for (trait, column) in self._traits.items():
+            column.append(personality.get(trait))
+        if self._dnd:
+            self._stats.extend(stats)
+            self._levels.extend(level)
+            self._classes.append(attrs["dnd_class"])
+            self._proficiencies.append(proficiencies)
+        for attr in extras:
+            self._extra(attr)
+        for (attr, column) in self._extras.items():
+            column.append(extras.get(attr))
+        self._size += 1
+
+    def extend(self, characters):
+        for character in characters:
+            self.append(character)
+
+    def set_column(self, attr, values):
+        """Set an extra attribute for every character, in row order."""
+        values = list(values)
+        if len(values) != self._size:
+            raise ValueError(f"set_column() needs {self._size} values!")
+        for val in values:
+            try:
+                hash(val)
+            except TypeError:
+                raise TypeError(f"CharacterBatch can't store {attr}, "
+                                + f"a {type(val).__name__}!") from None
+        column = self._extra(attr)
+        codes = column.codes
+        for (row, value) in enumerate(values):
+            codes[row] = column.code(value)
+
+    def column(self, attr):
+        """Return every character's value of attr, in row order."""
+        if attr == "age":
+            return list(self._ages)
+        for columns in (self._core, self._traits, self._extras):
+            if attr in columns:
+                return list(columns[attr])
+        raise KeyError(f"This batch has no {attr} column!")
+
+    def _text_column(self, attr):
+        """Return the coded _Column for attr, for queries."""
+        for columns in (self._core, self._traits, self._extras):
+            if attr in columns:
+                return columns[attr]
+        raise KeyError(f"This batch has no {attr} column!")
+
+    def _row_attrs(self, row):
+        """Return the core attributes and personality of a row."""
+        attrs = {attr: column[row] for (attr, column) in self._core.items()}
+        attrs["age"] = self._ages[row]
+        attrs["personality"] = {trait: column[row]
+                                for (trait, column) in self._traits.items()
+                                if column.codes[row]}
+        return attrs
+
+    def _row_extras(self, row):
+        return {attr: column[row] for (attr, column) in self._extras.items()
+                if column.codes[row]}
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, row):
+        """Build the character in row as a cls instance."""
+        if not -self._size <= row < self._size:
+            raise IndexError(f"This batch has {self._size} characters!")
+        row %= self._size
+        attrs = self._row_attrs(row)
+        if self._dnd:
+            stats = self._stats[6*row:6*row + 6]
+            attrs["stats"] = dict(zip(STATS, stats))
+            attrs["level"] = self._levels[row]
+            attrs["dnd_class"] = self._classes[row]
+            attrs["proficiencies"] = _unpack_proficiencies(
+                self._proficiencies[row])
+        character = self.cls._from_attrs(attrs, {})
+        for (attr, value) in self._row_extras(row).items():
+            setattr(character, attr, value)
+        return character
+
+    def __iter__(self):
+        return (self[row] for row in range(self._size))
+
+    def to_list(self):
+        """Return every character as a cls instance."""
+        return list(self)
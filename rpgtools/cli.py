@@ -0,0 +1,96 @@
+"""The rpgtools command: stream generated characters or adventures to stdout.
+
+    rpgtools characters 1000000 --seed 1 --workers 4 > town.ndjson
+    rpgtools dnd 6 --format text
+    rpgtools adventures 100 --setting goh --format text | less
+
+Records are written as they're generated, chunk records at a time, so the
+output can feed a pipeline of any length without being held in memory.
+"""
+
+import argparse
+import os
+import sys
+
+from rpgtools import ADV_DICT, CHAR_DICT, Adventure, Character
+from rpgtools.dnd import DndCharacter
+from rpgtools.ndjson import dumps
+
+KINDS = {
+    "characters": Character,
+    "dnd": DndCharacter,
+    "adventures": Adventure,
+}
+
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog="rpgtools",
+        description="Generate characters, D&D characters or adventures.")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("n", type=int, help="how many to generate")
+    parser.add_argument("--format", choices=("ndjson", "text"),
+                        default="ndjson")
+    parser.add_argument("--seed", type=int,
+                        help="make the output reproducible")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes to generate with")
+    parser.add_argument("--setting",
+                        help="character setting, or adventure type for adventures")
+    parser.add_argument("--chunk", type=int, default=1000,
+                        help="records written per flush")
+    return parser
+
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    if args.n < 0 or args.workers < 1 or args.chunk < 1:
+        print("rpgtools: n must be 0 or more, workers and chunk 1 or more",
+              file=sys.stderr)
+        return 2
+    cls = KINDS[args.kind]
+    kwargs = {}
+    if args.setting is not None:
+        if cls is DndCharacter:
+            print("rpgtools: D&D characters are always fantasy; drop --setting",
+                  file=sys.stderr)
+            return 2
+        choices = ADV_DICT if cls is Adventure else CHAR_DICT
+        if args.setting not in choices:
+            print(f"rpgtools: no {args.setting} setting; choose from "
+                  + ", ".join(choices), file=sys.stderr)
+            return 2
+        kwargs["adv_type" if cls is Adventure else "setting"] = args.setting
+
+    if args.format == "ndjson":
+        render = dumps
+    else:
+        def render(obj):
+            return str(obj).strip("\n") + "\n\n"
+
+    out = sys.stdout
+    chunk = []
+    try:
+        for obj in cls.iter_many(args.n, args.workers, args.seed, **kwargs):
+            chunk.append(render(obj))
+            if len(chunk) == args.chunk:
+                out.write("".join(chunk))
+                out.flush()
+                chunk = []
+        out.write("".join(chunk))
+        out.flush()
+    except ValueError as e:
+        out.write("".join(chunk))
+        out.flush()
+        print(f"rpgtools: can't generate {args.kind}: {e}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head); stop quietly
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, out.fileno())
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
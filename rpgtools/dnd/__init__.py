@@ -1,5 +1,9 @@
-from random import randint, sample
+from collections import namedtuple
+from fractions import Fraction
+from itertools import accumulate
 import rpgtools
+from rpgtools import _as_generator, _as_random, _numpy
+from rpgtools.dnd.expression import compile_expression
 
 SKILLS = {"Acrobatics": "dex",
           "Animal Handling": "wis",
@@ -21,6 +25,11 @@ SKILLS = {"Acrobatics": "dex",
           "Survival": "wis"
           }
 
+# The skills which depend on each stat
+_STAT_SKILLS = {stat: tuple(skill for (skill, val) in SKILLS.items()
+                            if val == stat)
+                for stat in set(SKILLS.values())}
+
 CLASS_SKILLS = {"barbarian": (
                     "Animal Handling",
                     "Athletics",
@@ -88,15 +97,21 @@ STATS_FULL_NAMES = ("strength",
 
 
 class Roll:
+    """Roll num dice of size die and add mod.
+
+    Every way of rolling takes an optional rng (a random.Random or numpy
+    Generator) to draw from instead of the random module."""
 
-    def __init__(self, num=1, die=20, mod=0, *, dropleast=False, **kwargs):
+    def __init__(self, num=1, die=20, mod=0, *, dropleast=False, rng=None,
+                 **kwargs):
         self.num = num
         self.die = die
         self.mod = mod
 
+        rng = _as_random(rng)
         self.rolls = []
         for i in range(num):
-            self.rolls.append(randint(1, die))
+            self.rolls.append(rng.randint(1, die))
         if dropleast:
             self.rolls.remove(min(self.rolls))
         if "result" not in kwargs:
@@ -162,79 +177,638 @@ class Roll:
             raise TypeError(f"Can't subtract a Roll from {type(other)}!")
 
     @classmethod
-    def from_string(cls, string):
-        mod = 0
-        # Check if + or - is in the string and log its location
-        ind = max(string.find('+'), string.find('-'))
-        # If it is in the string,
-        if ind != -1:
-            # set mod to everything after its position in the string
-            mod = int(string[ind:])
-            # and set the string to the preceding
-            string = string[:ind]
-        num, die = int(string.split('d')[0]), int(string.split('d')[1])
-        return cls(num, die, mod)
+    def from_string(cls, string, rng=None):
+        """Roll a dice expression such as "1d20+5" or "2d8+1d6+4".
+
+        See rpgtools.dnd.expression for the full grammar. Plain NdS+M
+        strings give a normal Roll; anything else gives a Roll holding only
+        the total."""
+        expr = compile_expression(string)
+        if expr.simple is not None:
+            return cls(*expr.simple, rng=rng)
+        return cls(0, 0, 0, result=expr.roll(rng))
 
     @classmethod
-    def advantage(cls, num=1, die=20, mod=0):
+    def advantage(cls, num=1, die=20, mod=0, rng=None):
         """Return the highest of two rolls."""
-        a, b = cls(num, die, mod), cls(num, die, mod)
+        rng = _as_random(rng)
+        a, b = cls(num, die, mod, rng=rng), cls(num, die, mod, rng=rng)
         return max(a, b)
 
     @classmethod
-    def disadvantage(cls, num=1, die=20, mod=0):
+    def disadvantage(cls, num=1, die=20, mod=0, rng=None):
         """Return the lowest of two rolls."""
-        a, b = cls(num, die, mod), cls(num, die, mod)
+        rng = _as_random(rng)
+        a, b = cls(num, die, mod, rng=rng), cls(num, die, mod, rng=rng)
         return min(a, b)
 
     @classmethod
-    def drop_least(cls, num=4, die=6, mod=0):
+    def drop_least(cls, num=4, die=6, mod=0, rng=None):
         """Return a multi-die Roll with the lowest die roll dropped."""
-        return cls(num, die, mod, dropleast=True)
+        return cls(num, die, mod, dropleast=True, rng=rng)
+
+    @staticmethod
+    def sample_many(num=1, die=20, mod=0, n=1, *, dropleast=False,
+                    advantage=False, disadvantage=False, rng=None):
+        """Return a numpy array of n results, without building Roll objects.
+
+        Matches Roll(), drop_least(), advantage() and disadvantage() in
+        distribution. Requires numpy."""
+        np = _numpy("Roll.sample_many()")
+        rng = _as_generator(rng)
+
+        def sample():
+            rolls = rng.integers(1, die + 1, size=(n, num),
+                                 dtype=np.int32)
+            out = rolls.sum(axis=1, dtype=np.int64)
+            if dropleast:
+                out -= rolls.min(axis=1)
+            return out + mod
+
+        if advantage and not disadvantage:
+            return np.maximum(sample(), sample())
+        elif disadvantage and not advantage:
+            return np.minimum(sample(), sample())
+        return sample()
+
+    @staticmethod
+    def distribution(num=1, die=20, mod=0, *, dropleast=False,
+                     advantage=False, disadvantage=False):
+        """Return the exact Distribution of the equivalent roll's result."""
+        if advantage and disadvantage:
+            advantage = disadvantage = False
+        face = [0] + [1]*die
+        if not dropleast:
+            counts = _poly_pow(face, num)
+        else:
+            # Split on the lowest die m: every die >= m, minus every die > m,
+            # then shift the sum down by m to drop it
+            counts = [0]*(die*num)
+            for m in range(1, die + 1):
+                at_least = _poly_pow([0]*m + [1]*(die - m + 1), num)
+                above = _poly_pow([0]*(m + 1) + [1]*(die - m), num)
+                for (total, n) in enumerate(at_least):
+                    if total >= m:
+                        counts[total - m] += n - (above[total] if total < len(above) else 0)
+        dist = Distribution.from_counts(
+            {total + mod: n for (total, n) in enumerate(counts) if n})
+        if advantage:
+            return dist.highest(dist)
+        elif disadvantage:
+            return dist.lowest(dist)
+        return dist
+
+
+def _poly_pow(coeffs, num):
+    """Raise a polynomial, given as a list of coefficients, to num."""
+    out = [1]
+    for i in range(num):
+        new = [0]*(len(out) + len(coeffs) - 1)
+        for (j, a) in enumerate(out):
+            if a:
+                for (k, b) in enumerate(coeffs):
+                    new[j + k] += a*b
+        out = new
+    return out
+
+
+class Distribution:
+    """The exact probability of each result of a roll.
+
+    Comparisons return the probability that they hold, so dist >= 15 is the
+    chance to meet DC 15. Adding or subtracting a number shifts the results,
+    and adding or subtracting another Distribution combines independent rolls."""
+
+    def __init__(self, pmf):
+        self.pmf = dict(sorted(pmf.items()))
+
+    @classmethod
+    def from_counts(cls, counts):
+        """Build a Distribution from {result: number of ways to roll it}."""
+        total = sum(counts.values())
+        return cls({val: Fraction(n, total) for (val, n) in counts.items()})
+
+    def __str__(self):
+        return ", ".join(f"{val}: {float(p):.2%}" for (val, p) in self.pmf.items())
+
+    def _combine(self, other, op):
+        out = {}
+        for (a, p) in self.pmf.items():
+            for (b, q) in other.pmf.items():
+                out[op(a, b)] = out.get(op(a, b), 0) + p*q
+        return Distribution(out)
+
+    def _prob(self, other, op):
+        if isinstance(other, Roll):
+            other = other.result
+        if isinstance(other, Distribution):
+            return sum(p*q for (a, p) in self.pmf.items()
+                       for (b, q) in other.pmf.items() if op(a, b))
+        elif isinstance(other, int) or isinstance(other, float):
+            return sum(p for (a, p) in self.pmf.items() if op(a, other))
+        else:
+            raise TypeError(f"Can't compare {type(other)} with a Distribution!")
+
+    def __lt__(self, other):
+        return self._prob(other, lambda a, b: a < b)
+
+    def __le__(self, other):
+        return self._prob(other, lambda a, b: a <= b)
+
+    def __gt__(self, other):
+        return self._prob(other, lambda a, b: a > b)
+
+    def __ge__(self, other):
+        return self._prob(other, lambda a, b: a >= b)
+
+    def __add__(self, other):
+        if isinstance(other, Roll):
+            other = other.result
+        if isinstance(other, Distribution):
+            return self._combine(other, lambda a, b: a + b)
+        elif isinstance(other, int) or isinstance(other, float):
+            return Distribution({val + other: p for (val, p) in self.pmf.items()})
+        else:
+            raise TypeError(f"Can't add {type(other)} to a Distribution!")
+
+    def __sub__(self, other):
+        if isinstance(other, Roll):
+            other = other.result
+        if isinstance(other, Distribution):
+            return self._combine(other, lambda a, b: a - b)
+        elif isinstance(other, int) or isinstance(other, float):
+            return Distribution({val - other: p for (val, p) in self.pmf.items()})
+        else:
+            raise TypeError(f"Can't subtract {type(other)} from a Distribution!")
+
+    def __radd__(self, other):
+        return self + other
+
+    def __rsub__(self, other):
+        if isinstance(other, Roll):
+            other = other.result
+        if isinstance(other, int) or isinstance(other, float):
+            return Distribution({other - val: p for (val, p) in self.pmf.items()})
+        else:
+            raise TypeError(f"Can't subtract a Distribution from {type(other)}!")
+
+    def cdf(self, value):
+        """Return the probability of rolling value or lower."""
+        return self <= value
+
+    def highest(self, other):
+        """Return the Distribution of the higher of this and another roll."""
+        return self._combine(other, max)
+
+    def lowest(self, other):
+        """Return the Distribution of the lower of this and another roll."""
+        return self._combine(other, min)
+
+    def mean(self):
+        """Return the expected result."""
+        return sum(val*p for (val, p) in self.pmf.items())
+
+    def percentile(self, percent):
+        """Return the lowest result at or above the given percentile."""
+        total = 0
+        for (val, p) in self.pmf.items():
+            total += p
+            if 100*total >= percent:
+                return val
+        return val
+
+    def dc_table(self, dcs):
+        """Return {dc: probability of meeting it} for each DC in dcs."""
+        return {dc: self >= dc for dc in dcs}
+
+
+class _StatDict(dict):
+    """A dict of stats which tells its character which stat changed."""
+
+    def __init__(self, owner, data=()):
+        super().__init__(data)
+        self._owner = owner
+
+    def _changed(self, stat):
+        # Unpickling fills the dict before _owner is restored
+        owner = getattr(self, "_owner", None)
+        if owner is not None:
+            owner._stat_changed(stat)
+
+    def __setitem__(self, stat, val):
+        super().__setitem__(stat, val)
+        self._changed(stat)
+
+    def __delitem__(self, stat):
+        super().__delitem__(stat)
+        self._changed(stat)
+
+    def update(self, *args, **kwargs):
+        for (stat, val) in dict(*args, **kwargs).items():
+            self[stat] = val
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def pop(self, stat, *default):
+        if not dict.__contains__(self, stat):
+            return super().pop(stat, *default)
+        val = super().pop(stat)
+        self._changed(stat)
+        return val
+
+    def popitem(self):
+        (stat, val) = super().popitem()
+        self._changed(stat)
+        return (stat, val)
+
+    def setdefault(self, stat, default=None):
+        if not dict.__contains__(self, stat):
+            self[stat] = default
+        return super().__getitem__(stat)
+
+    def clear(self):
+        stats = list(dict.keys(self))
+        super().clear()
+        for stat in stats:
+            self._changed(stat)
+
+
+class _ProficiencyList(list):
+    """A list of skills which tells its character when it changes."""
+
+    def __init__(self, owner, data=()):
+        super().__init__(data)
+        self._owner = owner
+
+    def _changed(self):
+        owner = getattr(self, "_owner", None)
+        if owner is not None:
+            owner._proficiencies_changed()
+
+    def append(self, skill):
+        super().append(skill)
+        self._changed()
+
+    def extend(self, skills):
+        super().extend(skills)
+        self._changed()
+
+    def insert(self, i, skill):
+        super().insert(i, skill)
+        self._changed()
+
+    def remove(self, skill):
+        super().remove(skill)
+        self._changed()
+
+    def pop(self, i=-1):
+        skill = super().pop(i)
+        self._changed()
+        return skill
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def __setitem__(self, i, skill):
+        super().__setitem__(i, skill)
+        self._changed()
+
+    def __delitem__(self, i):
+        super().__delitem__(i)
+        self._changed()
+
+    def __iadd__(self, skills):
+        super().extend(skills)
+        self._changed()
+        return self
+
+
+class _DerivedDict(dict):
+    """A dict whose stale entries are recomputed one at a time when read.
+
+    Entries are marked stale with mark(); reading one calls its character's
+    compute method for just that key. Any other read of the dict (iterating,
+    items(), comparing, printing, popping) brings every entry up to date
+    first, and writing an entry makes it fresh."""
+
+    def __init__(self, owner, compute, keys=()):
+        super().__init__(dict.fromkeys(keys))
+        self._owner = owner
+        self._compute = compute
+        self._stale = set(keys)
+
+    def mark(self, *keys):
+        for key in keys:
+            if not dict.__contains__(self, key):
+                super().__setitem__(key, None)
+            self._stale.add(key)
+
+    def drop(self, key):
+        if dict.__contains__(self, key):
+            super().__delitem__(key)
+        self._stale.discard(key)
+
+    def _fresh(self, key):
+        if key in self._stale:
+            self._stale.discard(key)
+            super().__setitem__(key, getattr(self._owner, self._compute)(key))
+
+    def refresh(self):
+        for key in list(self._stale):
+            self._fresh(key)
+
+    # --- Reads ---
+    def __getitem__(self, key):
+        self._fresh(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        return self[key] if dict.__contains__(self, key) else default
+
+    def __contains__(self, key):
+        self.refresh()
+        return super().__contains__(key)
+
+    def __len__(self):
+        self.refresh()
+        return super().__len__()
+
+    def __iter__(self):
+        self.refresh()
+        return super().__iter__()
+
+    def keys(self):
+        self.refresh()
+        return super().keys()
+
+    def items(self):
+        self.refresh()
+        return super().items()
+
+    def values(self):
+        self.refresh()
+        return super().values()
+
+    def copy(self):
+        self.refresh()
+        return dict(super().items())
+
+    def __eq__(self, other):
+        self.refresh()
+        return super().__eq__(other)
+
+    def __ne__(self, other):
+        self.refresh()
+        return super().__ne__(other)
+
+    def __or__(self, other):
+        self.refresh()
+        return dict(super().items()) | other
+
+    def __ror__(self, other):
+        self.refresh()
+        return other | dict(super().items())
+
+    def __repr__(self):
+        self.refresh()
+        return super().__repr__()
+
+    def __reduce_ex__(self, protocol):
+        self.refresh()
+        return super().__reduce_ex__(protocol)
+
+    # --- Writes ---
+    def _written(self, key):
+        # Unpickling fills the dict before _stale is restored
+        if "_stale" in self.__dict__:
+            self._stale.discard(key)
+
+    def pop(self, key, *default):
+        self._fresh(key)
+        self._stale.discard(key)
+        return super().pop(key, *default)
+
+    def popitem(self):
+        self.refresh()
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self._fresh(key)
+        return super().setdefault(key, default)
+
+    def __setitem__(self, key, val):
+        self._written(key)
+        super().__setitem__(key, val)
+
+    def __delitem__(self, key):
+        self._written(key)
+        super().__delitem__(key)
+
+    def update(self, *args, **kwargs):
+        for (key, val) in dict(*args, **kwargs).items():
+            self[key] = val
+
+    def clear(self):
+        self._stale.clear()
+        super().clear()
+
+
+# The exact odds of each 4d6-drop-lowest stat, for drawing stats in bulk
+_STAT_ODDS = Roll.distribution(4, 6, dropleast=True).pmf
+_STAT_RESULTS = tuple(_STAT_ODDS)
+_STAT_CUM_WEIGHTS = tuple(accumulate(int(p*6**4)
+                                     for p in _STAT_ODDS.values()))
 
 
 class DndCharacter(rpgtools.Character):
+    """A Character with 5e stats, skills and proficiencies.
+
+    Changing stats, level or proficiencies only marks the mods, prof_mod
+    and skill_mods that depend on them as stale; each is recomputed the next
+    time it's read."""
 
-    def __init__(self, **kwargs):
+    def __init__(self, rng=None, **kwargs):
         # So it isn't passed in when loading a character
         if "setting" in kwargs:
             del kwargs["setting"]
-        super().__init__(setting="fantasy", **kwargs)
-
-        self.stats = {}
-        self.mods = {}
-        self.skill_mods = {}
+        rng = _as_random(rng)
+        super().__init__(setting="fantasy", rng=rng, **kwargs)
+        self._fill(kwargs, rng)
+
+    def _fill(self, kwargs, rng):
+        """Set stats, level, dnd_class and proficiencies from kwargs,
+        drawing any that are missing from rng."""
+        # Stats, level and proficiencies are filled in without notifying
+        # anything; every derived entry is marked stale once at the end
+        self.__dict__["_prof_stale"] = True
+        self.__dict__["stats"] = _StatDict(None)
+        self.__dict__["mods"] = _DerivedDict(self, "_compute_mod")
+        self.__dict__["skill_mods"] = _DerivedDict(self, "_compute_skill_mod",
+                                                   SKILLS)
         for item in ("stats",
                      "level",
                      "dnd_class",
                      "proficiencies"):
             if item in kwargs and item != "stats":
-                self.__dict__[item] = kwargs[item]
+                value = kwargs[item]
             # Allow passing stats as an ordered tuple or as a dict
             elif item in kwargs and item == "stats":
                 if isinstance(kwargs["stats"], tuple):
                     self.set_stats(*kwargs["stats"])
                 elif isinstance(kwargs["stats"], dict):
-                    self.stats = kwargs["stats"]
+                    self.__dict__["stats"] = _StatDict(None, kwargs["stats"])
+                continue
             else:
                 if item == "stats":
-                    self.roll_stats()
+                    self.roll_stats(rng)
+                    continue
                 elif item == "level":
-                    self.level = 1
+                    value = 1
                 elif item == "dnd_class":
-                    self.dnd_class = "npc"
-                elif self.dnd_class == "npc" and item == "proficiencies":
-                    self.proficiencies = sample(list(SKILLS), 5)
-                elif self.dnd_class != "npc" and item == "proficiencies":
+                    value = "npc"
+                elif self.dnd_class == "npc":
+                    value = rng.sample(list(SKILLS), 5)
+                else:
                     c = self.dnd_class
-                    self.proficiencies = sample(CLASS_SKILLS[c],
-                                                CLASS_NUMBER_PROFICIENCIES[c])
-        self.update_mods()
-        self.update_skill_mods()
+                    value = rng.sample(CLASS_SKILLS[c],
+                                       CLASS_NUMBER_PROFICIENCIES[c])
+            if item == "proficiencies":
+                value = _ProficiencyList(self, value)
+            self.__dict__[item] = value
+        self.stats._owner = self
+        self.mods.mark(*self.stats)
+        for stat in STATS:
+            if stat not in self.stats:
+                self._stat_changed(stat)
+        self.__dict__["prof_mod"] = None
 
-    def roll_stats(self):
+    @classmethod
+    def bulk(cls, n, rng=None, **fixed):
+        """Return a list of n characters; see rpgtools.Character.bulk().
+
+        Unless fixed, everyone's stats are drawn at once from the exact
+        4d6-drop-lowest odds instead of rolling dice for each."""
+        fixed["setting"] = "fantasy"
+        return super().bulk(n, rng=rng, **fixed)
+
+    @classmethod
+    def _bulk_columns(cls, n, rng, fixed):
+        if "stats" in fixed:
+            return {}
+        rolls = rng.choices(_STAT_RESULTS, cum_weights=_STAT_CUM_WEIGHTS,
+                            k=6*n)
+        return {"stats": [dict(zip(STATS, rolls[i:i + 6]))
+                          for i in range(0, 6*n, 6)]}
+
+    @classmethod
+    def _from_attrs(cls, attrs, extra):
+        if not all(attr in attrs for attr in rpgtools._BULK_ATTRS):
+            return cls(**attrs, **extra)
+        obj = cls.__new__(cls)
+        for attr in rpgtools._BULK_ATTRS:
+            obj.__dict__[attr] = attrs[attr]
+        obj.__dict__["setting"] = "fantasy"
+        kwargs = dict(attrs, **extra)
+        obj._fill(kwargs, _as_random(kwargs.pop("rng", None)))
+        return obj
+
+    def _attrs(self):
+        self.mods.refresh()
+        self.skill_mods.refresh()
+        self.prof_mod
+        return super()._attrs()
+
+    # --- Tracked attributes, stored in __dict__ so they print and save ---
+    @property
+    def stats(self):
+        return self.__dict__["stats"]
+
+    @stats.setter
+    def stats(self, stats):
+        old = self.__dict__.get("stats", {})
+        self.__dict__["stats"] = _StatDict(self, stats)
+        for stat in list(stats) + [stat for stat in old if stat not in stats]:
+            self._stat_changed(stat)
+
+    @property
+    def level(self):
+        return self.__dict__["level"]
+
+    @level.setter
+    def level(self, level):
+        self.__dict__["level"] = level
+        self.__dict__["_prof_stale"] = True
+        if "proficiencies" in self.__dict__:
+            self._proficiencies_changed()
+
+    @property
+    def proficiencies(self):
+        return self.__dict__["proficiencies"]
+
+    @proficiencies.setter
+    def proficiencies(self, proficiencies):
+        self.__dict__["proficiencies"] = _ProficiencyList(self, proficiencies)
+        self._proficiencies_changed()
+
+    @property
+    def mods(self):
+        return self.__dict__["mods"]
+
+    @property
+    def skill_mods(self):
+        return self.__dict__["skill_mods"]
+
+    @property
+    def prof_mod(self):
+        if self.__dict__["_prof_stale"]:
+            # 5e proficiency mod scales with this formula (2 @ 1-4, 3 @ 5-8, etc)
+            self.__dict__["prof_mod"] = (self.level - 1) // 4 + 2
+            self.__dict__["_prof_stale"] = False
+        return self.__dict__["prof_mod"]
+
+    # --- Dependency tracking ---
+    def _stat_changed(self, stat):
+        mods = self.__dict__.get("mods")
+        if mods is None:
+            return
+        # Skills based on a stat the character no longer has are dropped
+        # along with its mod
+        if dict.__contains__(self.stats, stat):
+            mods.mark(stat)
+            self.skill_mods.mark(*_STAT_SKILLS.get(stat, ()))
+        else:
+            mods.drop(stat)
+            for skill in _STAT_SKILLS.get(stat, ()):
+                self.skill_mods.drop(skill)
+
+    def _known_skills(self):
+        """Return the skills whose stat the character has."""
+        if len(self.stats) == len(STATS):
+            return SKILLS
+        return [skill for (skill, stat) in SKILLS.items()
+                if stat in self.stats]
+
+    def _proficiencies_changed(self):
+        skill_mods = self.__dict__.get("skill_mods")
+        if skill_mods is not None:
+            skill_mods.mark(*self._known_skills())
+
+    def _compute_mod(self, stat):
+        return (self.stats[stat]-10)//2
+
+    def _compute_skill_mod(self, key):
+        skill = self.mods[SKILLS[key]]
+        if key in self.proficiencies:
+            skill += self.prof_mod
+        return skill
+
+    def roll_stats(self, rng=None):
+        rng = _as_random(rng)
         for stat in ("str", "dex", "con", "int", "wis", "cha"):
-            self.stats[stat] = int(Roll.drop_least())
+            self.stats[stat] = int(Roll.drop_least(rng=rng))
 
     def set_stats(self, *args):
         # Check input type
@@ -249,14 +823,62 @@ class DndCharacter(rpgtools.Character):
             raise IndexError("set_stats() requires 6 inputs!")
 
     def update_mods(self):
-        for stat in self.stats.keys():
-            self.mods[stat] = (self.stats[stat]-10)//2
-        # 5e proficiency mod scales with this formula (2 @ 1-4, 3 @ 5-8, etc)
-        self.prof_mod = (self.level - 1) // 4 + 2
+        """Recompute every stat mod now; prof_mod follows on its next read."""
+        self.mods.mark(*self.stats)
+        self.mods.refresh()
+        self.__dict__["_prof_stale"] = True
 
     def update_skill_mods(self):
-        for key in SKILLS:
-            skill = self.mods[SKILLS[key]]
-            if key in self.proficiencies:
-                skill += self.prof_mod
-            self.skill_mods[key] = skill
+        """Recompute every skill mod now."""
+        self.skill_mods.mark(*self._known_skills())
+        self.skill_mods.refresh()
+
+
+# Results of party_check(). With a single DC, totals, success and probability
+# hold one entry per character and group_probability is a float; with a list
+# of DCs, success and probability have one column and group_probability one
+# entry per DC.
+PartyCheck = namedtuple("PartyCheck", ("totals", "success", "probability",
+                                       "group_probability"))
+
+
+def party_check(party, skill, dc, *, advantage=False, disadvantage=False,
+                rng=None):
+    """Roll a skill check for every DndCharacter in party at once.
+
+    skill is a key of SKILLS or an ability in STATS; dc may be one DC or a
+    sequence of them. Besides the rolled results, returns each character's
+    exact chance of success and the chance that at least half the party
+    succeeds, as for a 5e group check. Requires numpy."""
+    np = _numpy("party_check()")
+    if skill in SKILLS:
+        mods = np.array([c.skill_mods[skill] for c in party], dtype=np.int64)
+    elif skill in STATS:
+        mods = np.array([c.mods[skill] for c in party], dtype=np.int64)
+    else:
+        raise KeyError(f"{skill} is neither a skill nor an ability!")
+    dcs = np.atleast_1d(np.asarray(dc, dtype=np.int64))
+
+    totals = Roll.sample_many(1, 20, 0, len(party), advantage=advantage,
+                              disadvantage=disadvantage, rng=rng) + mods
+    success = totals[:, None] >= dcs[None, :]
+
+    # at_least[k] is the chance the d20 shows k or more, for k in 0..21
+    d20 = Roll.distribution(1, 20, advantage=advantage,
+                            disadvantage=disadvantage)
+    at_least = np.array([float(d20 >= k) for k in range(22)])
+    needed = np.clip(dcs[None, :] - mods[:, None], 0, 21)
+    probability = at_least[needed]
+
+    # Chance of exactly k successes, built up one character at a time
+    exactly = np.zeros((len(party) + 1, len(dcs)))
+    exactly[0] = 1
+    for p in probability:
+        exactly[1:] = exactly[1:]*(1 - p) + exactly[:-1]*p
+        exactly[0] *= 1 - p
+    group_probability = exactly[(len(party) + 1)//2:].sum(axis=0)
+
+    if np.ndim(dc) == 0:
+        return PartyCheck(totals, success[:, 0], probability[:, 0],
+                          float(group_probability[0]))
+    return PartyCheck(totals, success, probability, group_probability)
@@ -0,0 +1,169 @@
+"""Dice expressions beyond a single NdS+M.
+
+An expression is a sum of dice terms and integer constants, e.g.
+"2d8+1d6+4" or "4d6dl1 - 2". Dice terms take any of these modifiers:
+    khN / klN: keep the N highest / lowest dice (N defaults to 1)
+    dhN / dlN: drop the N highest / lowest dice (N defaults to 1)
+    rN: reroll each die showing N or lower once (N defaults to 1)
+    adv / dis: roll the whole term twice and keep the higher / lower total
+A term takes at most one keep or drop, one reroll and one of adv or dis.
+"d%" is a d100 and a missing count means one die, so "d20adv+5" works.
+
+compile_expression() parses the text once and caches the result, so
+repeated rolls of the same expression skip parsing entirely.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+import re
+
+from rpgtools import _as_generator, _as_random, _numpy
+
+_TERM = re.compile(r"(?:(?P<num>\d*)d(?P<die>\d+|%)"
+                   r"(?P<mods>(?:kh\d*|kl\d*|dh\d*|dl\d*|r\d*|adv|dis)*)"
+                   r"|(?P<const>\d+))")
+_MOD = re.compile(r"(kh|kl|dh|dl|r|adv|dis)(\d*)")
+
+# keep: ("h" or "l", number of dice) or None; reroll: 0 for no rerolls;
+# best: 1 for advantage, -1 for disadvantage, 0 for neither
+Term = namedtuple("Term", ("sign", "num", "die", "keep", "reroll", "best"))
+
+
+class Expression:
+    """A parsed dice expression which can be rolled once or in bulk."""
+
+    def __init__(self, text, terms, mod):
+        self.text = text
+        self.terms = tuple(terms)
+        self.mod = mod
+
+    def __repr__(self):
+        return f"Expression({self.text!r})"
+
+    @property
+    def simple(self):
+        """Return (num, die, mod) if this is a plain NdS+M, else None."""
+        if len(self.terms) != 1:
+            return None
+        term = self.terms[0]
+        if term.sign != 1 or term.keep or term.reroll or term.best:
+            return None
+        return (term.num, term.die, self.mod)
+
+    def roll(self, rng=None):
+        """Roll the expression once and return the total.
+
+        rng may be a random.Random or numpy Generator."""
+        rng = _as_random(rng)
+        return self.mod + sum(term.sign*_roll_term(term, rng)
+                              for term in self.terms)
+
+    def sample(self, n, rng=None):
+        """Roll the expression n times and return a numpy array of totals."""
+        np = _numpy("Expression.sample()")
+        rng = _as_generator(rng)
+        out = np.full(n, self.mod, dtype=np.int64)
+        for term in self.terms:
+            out += term.sign*_sample_term(term, n, rng)
+        return out
+
+
+def _keep(rolls, keep):
+    if keep is None:
+        return rolls
+    (side, count) = keep
+    rolls = sorted(rolls)
+    return rolls[-count:] if side == "h" else rolls[:count]
+
+
+def _roll_term(term, rng):
+    def once():
+        rolls = [rng.randint(1, term.die) for i in range(term.num)]
+        if term.reroll:
+            rolls = [rng.randint(1, term.die) if r <= term.reroll else r
+                     for r in rolls]
+        return sum(_keep(rolls, term.keep))
+
+    if term.best:
+        a, b = once(), once()
+        return max(a, b) if term.best > 0 else min(a, b)
+    return once()
+
+
+def _sample_term(term, n, rng):
+    np = _numpy("Expression.sample()")
+
+    def once():
+        rolls = rng.integers(1, term.die + 1, size=(n, term.num))
+        if term.reroll:
+            redo = rolls <= term.reroll
+            rolls[redo] = rng.integers(1, term.die + 1, size=redo.sum())
+        if term.keep is not None:
+            (side, count) = term.keep
+            rolls = np.sort(rolls, axis=1)
+            rolls = rolls[:, -count:] if side == "h" else rolls[:, :count]
+        return rolls.sum(axis=1)
+
+    if term.best:
+        a, b = once(), once()
+        return np.maximum(a, b) if term.best > 0 else np.minimum(a, b)
+    return once()
+
+
+def _parse_term(match, sign, text):
+    num = int(match["num"]) if match["num"] else 1
+    die = 100 if match["die"] == "%" else int(match["die"])
+    if num < 1 or die < 1:
+        raise ValueError(f"Dice terms need at least one die with one side: {text}")
+    keep, reroll, best = None, 0, 0
+    seen = set()
+    for (mod, count) in _MOD.findall(match["mods"]):
+        # Only one modifier of each kind: keep/drop, reroll and adv/dis
+        kind = {"kh": "k", "kl": "k", "dh": "k", "dl": "k",
+                "adv": "a", "dis": "a"}.get(mod, mod)
+        if kind in seen:
+            raise ValueError(f"Conflicting dice modifiers: {text}")
+        seen.add(kind)
+        count = int(count) if count else 1
+        if mod in ("kh", "kl"):
+            keep = (mod[1], count)
+        elif mod == "dl":
+            keep = ("h", num - count)
+        elif mod == "dh":
+            keep = ("l", num - count)
+        elif mod == "r":
+            reroll = count
+        else:
+            best = 1 if mod == "adv" else -1
+    if keep is not None and not 0 < keep[1] <= num:
+        raise ValueError(f"Can't keep {keep[1]} of {num} dice: {text}")
+    if reroll >= die:
+        raise ValueError(f"Can't reroll every face of a d{die}: {text}")
+    return Term(sign, num, die, keep, reroll, best)
+
+
+@lru_cache(maxsize=512)
+def compile_expression(text):
+    """Parse a dice expression into a cached Expression."""
+    string = "".join(text.lower().split())
+    terms, mod = [], 0
+    pos, sign = 0, 1
+    if string[:1] in ("+", "-"):
+        sign = -1 if string[0] == "-" else 1
+        pos = 1
+    while True:
+        match = _TERM.match(string, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f"Can't parse dice expression: {text}")
+        if match["const"] is not None:
+            mod += sign*int(match["const"])
+        else:
+            terms.append(_parse_term(match, sign, text))
+        pos = match.end()
+        if pos == len(string):
+            break
+        if string[pos] not in ("+", "-"):
+            raise ValueError(f"Can't parse dice expression: {text}")
+        sign = -1 if string[pos] == "-" else 1
+        pos += 1
+    return Expression(text, terms, mod)
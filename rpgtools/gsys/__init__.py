@@ -1,6 +1,10 @@
 """This submodule contains data for the Genesys role-playing game published by Fantasy Flight Games, LLC."""
 
-import random
+from collections import namedtuple
+from fractions import Fraction
+from functools import lru_cache
+
+from rpgtools import _as_generator, _as_random, _numpy
 
 FACES = {
     "b": ["", "", "s", "sa", "aa", "a"],  # Boost die faces
@@ -12,75 +16,160 @@ FACES = {
 }
 
 
+def _face_outcome(face):
+    """Return a face's (net successes, net advantage, triumphs, despairs) tuple."""
+    triumph, despair = face.count("T"), face.count("D")
+    success = face.count("s") + triumph - face.count("f") - despair
+    return (success, face.count("a") - face.count("d"), triumph, despair)
+
+
+# (net successes, net advantage, triumphs, despairs) for each face of each die
+FACE_OUTCOMES = {let: [_face_outcome(face) for face in faces] for (let, faces) in FACES.items()}
+
+
+@lru_cache(maxsize=None)
+def _face_arrays():
+    """Return FACE_OUTCOMES as numpy arrays, for Roll.batch()."""
+    np = _numpy("Roll.batch()")
+    return {let: np.array(outcomes, dtype=np.int16) for (let, outcomes) in FACE_OUTCOMES.items()}
+
+
+# Net results of many rolls of one pool, as returned by Roll.batch()
+Batch = namedtuple("Batch", ("success", "advantage", "triumph", "despair"))
+
+
+# Outcomes are packed into one int per pool so convolution only adds ints:
+# each field gets _WIDTH bits, successes and advantage offset by _OFFSET per die
+_WIDTH = 10
+_OFFSET = 2
+# A die adds at most 2*_OFFSET to a field, so more dice than this overflow it
+MAX_POOL = ((1 << _WIDTH) - 1) // (2*_OFFSET)
+
+
+def _pack(outcome):
+    """Pack a single die's outcome tuple into an int."""
+    key = 0
+    for (i, (val, off)) in enumerate(zip(outcome, (_OFFSET, _OFFSET, 0, 0))):
+        key += (val + off) << (_WIDTH * i)
+    return key
+
+
+def _unpack(key, num):
+    """Unpack a summed key for a pool of num dice back into an outcome tuple."""
+    mask = (1 << _WIDTH) - 1
+    fields = [(key >> (_WIDTH * i)) & mask for i in range(4)]
+    return (fields[0] - _OFFSET*num, fields[1] - _OFFSET*num, fields[2], fields[3])
+
+
+def _tally(faces):
+    """Count how many faces of a die produce each packed outcome."""
+    out = {}
+    for face in faces:
+        key = _pack(_face_outcome(face))
+        out[key] = out.get(key, 0) + 1
+    return out
+
+
+def _convolve(first, second):
+    """Combine two {packed outcome: count} dicts as if both pools were rolled together."""
+    out = {}
+    for (a, n) in first.items():
+        for (b, m) in second.items():
+            out[a + b] = out.get(a + b, 0) + n*m
+    return out
+
+
+# Per-die packed outcome counts, used by the exact probability engine
+OUTCOMES = {let: _tally(faces) for (let, faces) in FACES.items()}
+
+
+@lru_cache(maxsize=256)
+def _pool_counts(string):
+    """Return ({packed outcome: count}, total count) for a standardized, sorted pool string."""
+    counts = {0: 1}
+    total = 1
+    for let in string:
+        counts = _convolve(counts, OUTCOMES[let])
+        total *= len(FACES[let])
+    return counts, total
+
+
 class Roll():
-    """Take a passed string, roll dice and save the result to self.pool."""
+    """Take a passed string, roll dice and save the net result counts.
 
-    def __init__(self, string):
+    Pass rng (a random.Random or numpy Generator) to roll with it instead of the random module."""
+
+    def __init__(self, string, rng=None):
+        rng = _as_random(rng)
         self.string = Roll.standardize_input(string)
-        pool = []
+        self.raw_pool = []
+        counts = [0, 0, 0, 0]
         for let in self.string:
-            pool.append(random.choice(FACES[let]))
-        self.raw_pool = pool
-        # Join all results, as some are multiple letters, then resplit
-        self.symbols = list("".join(pool))
-
-        # For each triumph, add a success
-        for n in range(self.symbols.count("T")):
-            self.symbols.append("s")
-        # For each despair, add a failure
-        for n in range(self.symbols.count("D")):
-            self.symbols.append("f")
-
-        def cancel(*args):
-            for x in args:
-                pool.remove(x)
-        while True:
-            if "s" in pool and "f" in pool:
-                cancel("s", "f")
-            elif "a" in pool and "d" in pool:
-                cancel("a", "d")
-            else:
-                break
-        self.pool = pool
+            i = rng.randrange(len(FACES[let]))
+            self.raw_pool.append(FACES[let][i])
+            for (j, val) in enumerate(FACE_OUTCOMES[let][i]):
+                counts[j] += val
+        # Successes and failures, advantage and threat are already cancelled
+        (self.success, self.advantage, self.triumph, self.despair) = counts
+
+    @property
+    def pool(self):
+        """Return the symbols left once opposing symbols cancel out."""
+        return (["s"]*max(self.success, 0) + ["f"]*max(-self.success, 0)
+                + ["a"]*max(self.advantage, 0) + ["d"]*max(-self.advantage, 0)
+                + ["T"]*self.triumph + ["D"]*self.despair)
 
     def __str__(self):
         """Describe the pool in terms of success, failure, and special symbols."""
         output = ""
         # Check for special case where everything cancels out
-        if len(self.pool) == 0:
+        if not (self.success or self.advantage or self.triumph or self.despair):
             return "You failed with an empty pool."
 
         # Check for success/failure
-        if self.pool.count("s") > 1:
-            output += "You succeeded with %d successes" % self.pool.count("s")
-        elif "s" in self.pool:
+        if self.success > 1:
+            output += "You succeeded with %d successes" % self.success
+        elif self.success == 1:
             output += "You succeeded with 1 success"
-        elif self.pool.count("d") > 1:
-            output += "You failed with %d failures" % self.pool.count("f")
-        elif "f" in self.pool:
+        elif self.success < -1:
+            output += "You failed with %d failures" % -self.success
+        elif self.success == -1:
             output += "You failed with 1 failure"
         else:
             output += "You failed with 0 successes"
 
         # Check for adv/disadv and complete sentence
-        if "a" in self.pool:
-            output += " and %d advantage." % self.pool.count("a")
-        elif "d" in self.pool:
-            output += " and %d threat." % self.pool.count("d")
+        if self.advantage > 0:
+            output += " and %d advantage." % self.advantage
+        elif self.advantage < 0:
+            output += " and %d threat." % -self.advantage
         else:
             output += "."
 
         # Check for triumph and despair
-        if "T" in self.pool and "D" in self.pool:
-            td = (self.pool.count("T"), self.pool.count("D"))
-            output += " You got {0} Triumph and {1} Despair.".format(td[0], td[1])
-        elif "T" in self.pool:
-            output += " You got %d Triumph." % self.pool.count("T")
-        elif "D" in self.pool:
-            output += " You got %d Despair." % self.pool.count("D")
+        if self.triumph and self.despair:
+            output += " You got {0} Triumph and {1} Despair.".format(self.triumph, self.despair)
+        elif self.triumph:
+            output += " You got %d Triumph." % self.triumph
+        elif self.despair:
+            output += " You got %d Despair." % self.despair
 
         return output
 
+    @staticmethod
+    def batch(string, n, rng=None):
+        """Roll the pool n times at once and return a Batch of numpy arrays.
+
+        Each field holds n net results: success, advantage, triumph, despair. Requires numpy."""
+        np = _numpy("Roll.batch()")
+        string = Roll.standardize_input(string)
+        rng = _as_generator(rng)
+        totals = np.zeros((n, 4), dtype=np.int16)
+        arrays = _face_arrays()
+        for let in string:
+            totals += arrays[let][rng.integers(len(FACES[let]), size=n)]
+        return Batch(*totals.T)
+
     @staticmethod
     def standardize_input(string):
         """Replace alternate letter inputs with standard versions and return the altered string."""
@@ -90,52 +179,22 @@ class Roll():
         string = ''.join(char for char in string if char in 'pacdsb')
         return string
 
+    @staticmethod
+    def distribution(string):
+        """Given a string of dice to roll, return the exact joint distribution of its results.
+
+        Keys are (net successes, net advantage, triumphs, despairs) tuples, where net successes already include
+        triumphs and despairs, and values are Fractions summing to 1."""
+        # Results only depend on which dice are rolled, not their order
+        string = "".join(sorted(Roll.standardize_input(string)))
+        if len(string) > MAX_POOL:
+            raise ValueError(f"Can't compute the distribution of more than {MAX_POOL} dice!")
+        counts, total = _pool_counts(string)
+        return {_unpack(key, len(string)): Fraction(n, total) for (key, n) in counts.items()}
+
     @staticmethod
     def probability(string):
         """Given a string of dice to roll, return the % probability of a successful result on that check."""
-
-        # Standardize the input string
-        string = Roll.standardize_input(string)
-
-        # Confirm string length 0<x<9
-        if not (0 < len(string) < 9):
-            print("String is too short or too long! Must be 0 < length <= 8.")
-            return
-
-        # Empty list of possible pools given string
-        possible_pools = []
-        temp_f = {
-            "b": [0, 0, 1],  # Boost die faces
-            "s": [0, 0, -1],  # Setback die faces
-            "a": [0, 0, 0, 0, 1, 1, 1, 11],  # Ability die faces
-            "d": [0, 0, 0, 0, 0, -1, -1, -2],  # Difficulty die faces
-            "p": [0, 0, 1, 1, 1, 2],  # Proficiency die faces
-            "c": [0, 0, 0, 0, 0, -1, -1, -1, -1, -1, -2, -2]  # Challenge die faces
-        }
-
-        # For each letter in the string...
-        i = 1
-        for let in string:
-            if len(possible_pools) > 0:    # If there are already sample pools in the list,
-                temp_list = []      # 1. Create a holding list
-                print("Entering new processing level: " + str(i) + f"/{len(string)-1}")
-                i += 1
-                for s in possible_pools:   # 2. Then for each pre-existing sample pool,
-                    for f in temp_f[let]:    # 3. For each possible roll,
-                        temp_list.append(s + f)     # 4. Add one new pool to the holding list
-                possible_pools = temp_list     # 4. Then set the full pool list to equal the holding list
-            else:
-                for f in temp_f[let]:
-                    possible_pools.append(f)
-
-        # Tally of successful pools
-        success = 0
-
-        # For each pool in possible_pools, check if it's successful and increment success tally if it is
-        for r in possible_pools:
-           if r > 0:
-               success += 1
-
-        # Calculate % of pools which are successful and return a rounded percentage
-        prob = success/len(possible_pools)
-        return round(100*prob, 2)
+        dist = Roll.distribution(string)
+        prob = sum(p for (outcome, p) in dist.items() if outcome[0] > 0)
+        return round(100*float(prob), 2)
@@ -0,0 +1,191 @@
+"""Precomputed Genesys odds tables.
+
+build() walks every dice pool composition up to a given number of each die
+type, computes its exact outcome distribution, and writes the results to a
+compact binary file. OddsTable memory-maps such a file so each process only
+pages in the pools it is actually asked about.
+
+File layout (little-endian):
+    header: MAGIC, version (uint16), max dice per type (uint8 * len(DICE))
+    index:  one (offset uint64, entries uint32, success probability float64)
+            record per composition, in mixed-radix order of DICE
+    data:   (successes int8, advantage int8, triumph uint8, despair uint8,
+            probability float64) records
+
+Build from the command line with:
+    python -m rpgtools.gsys.odds odds.bin 3
+"""
+
+import itertools
+import mmap
+import os
+import struct
+import sys
+
+from rpgtools.gsys import (FACE_OUTCOMES, FACES, MAX_POOL, OUTCOMES, Roll,
+                           _convolve, _unpack)
+
+MAGIC = b"GSYSODDS"
+VERSION = 1
+# Die letters in the order they are counted in a composition
+DICE = tuple(FACES)
+
+_HEADER = struct.Struct(f"<8sH{len(DICE)}B")
+_INDEX = struct.Struct("<QId")
+_ENTRY = struct.Struct("<bbBBd")
+# The most each field of an entry can hold, in magnitude
+_ENTRY_LIMITS = (127, 127, 255, 255)
+
+
+def composition(string):
+    """Return the count of each die type in DICE for a dice string."""
+    string = Roll.standardize_input(string)
+    return tuple(string.count(let) for let in DICE)
+
+
+def _position(comp, max_dice):
+    """Return a composition's position in the index, or None if it is out of range."""
+    pos = 0
+    for (count, most) in zip(comp, max_dice):
+        if count > most:
+            return None
+        pos = pos*(most + 1) + count
+    return pos
+
+
+def build(path, max_dice=2):
+    """Write an odds table for every pool with up to max_dice of each die type.
+
+    max_dice may be an int for every type or a sequence ordered like DICE,
+    and is refused if the largest pool's outcomes wouldn't fit an entry.
+    Returns the number of compositions written."""
+    if isinstance(max_dice, int):
+        max_dice = (max_dice,)*len(DICE)
+    max_dice = tuple(max_dice)
+    if len(max_dice) != len(DICE):
+        raise ValueError(f"max_dice needs one entry per die type {DICE}!")
+
+    if sum(max_dice) > MAX_POOL:
+        raise ValueError(f"Pools can't have more than {MAX_POOL} dice!")
+    # The largest pool must still fit each field of an entry
+    for (i, limit) in enumerate(_ENTRY_LIMITS):
+        most = sum(count*max(abs(outcome[i]) for outcome in FACE_OUTCOMES[let])
+                   for (let, count) in zip(DICE, max_dice))
+        if most > limit:
+            raise ValueError(f"Pools this large can't be stored; keep each "
+                             f"field of an outcome within {limit}!")
+
+    comps = list(itertools.product(*(range(most + 1) for most in max_dice)))
+    data_start = _HEADER.size + _INDEX.size*len(comps)
+    # Each pool is built by adding its last die type to a smaller, already
+    # computed pool; pools are dropped once all their children are built
+    counts = {}
+    # Written to a temporary file first so a failed build never leaves a
+    # partial table at path
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, *max_dice))
+            f.seek(data_start)
+            index = []
+            offset = data_start
+            for comp in comps:
+                nonzero = [i for (i, count) in enumerate(comp) if count]
+                if not nonzero:
+                    (dist, total) = ({0: 1}, 1)
+                    last = 0
+                else:
+                    last = nonzero[-1]
+                    parent = comp[:last] + (comp[last] - 1,) + comp[last+1:]
+                    (parent_counts, parent_total, children) = counts[parent]
+                    if children == 1:
+                        del counts[parent]
+                    else:
+                        counts[parent] = (parent_counts, parent_total,
+                                          children - 1)
+                    dist = _convolve(parent_counts, OUTCOMES[DICE[last]])
+                    total = parent_total*len(FACES[DICE[last]])
+                children = sum(1 for i in range(last, len(DICE))
+                               if comp[i] < max_dice[i])
+                if children:
+                    counts[comp] = (dist, total, children)
+                num = sum(comp)
+                success = 0
+                records = []
+                for (key, n) in dist.items():
+                    outcome = _unpack(key, num)
+                    if outcome[0] > 0:
+                        success += n
+                    records.append(_ENTRY.pack(*outcome, n/total))
+                f.write(b"".join(records))
+                index.append(_INDEX.pack(offset, len(records), success/total))
+                offset += _ENTRY.size*len(records)
+            f.seek(_HEADER.size)
+            f.write(b"".join(index))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return len(comps)
+
+
+class OddsTable:
+    """Memory-mapped lookups into a table written by build().
+
+    Pools larger than the table fall back to Roll.distribution()."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, *max_dice) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {VERSION} odds table!")
+        self.max_dice = tuple(max_dice)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, string):
+        return _position(composition(string), self.max_dice) is not None
+
+    def close(self):
+        self._map.close()
+
+    def _record(self, string):
+        pos = _position(composition(string), self.max_dice)
+        if pos is None:
+            return None
+        return _INDEX.unpack_from(self._map, _HEADER.size + _INDEX.size*pos)
+
+    def probability(self, string):
+        """Return the % probability of success, as Roll.probability() does."""
+        record = self._record(string)
+        if record is None:
+            return Roll.probability(string)
+        return round(100*record[2], 2)
+
+    def distribution(self, string):
+        """Return {(successes, advantage, triumph, despair): probability} as floats."""
+        record = self._record(string)
+        if record is None:
+            return {k: float(v) for (k, v) in Roll.distribution(string).items()}
+        (offset, entries, _) = record
+        view = memoryview(self._map)[offset:offset + _ENTRY.size*entries]
+        try:
+            return {tuple(entry[:4]): entry[4]
+                    for entry in _ENTRY.iter_unpack(view)}
+        finally:
+            view.release()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python -m rpgtools.gsys.odds <path> [max dice per type]")
+        sys.exit(1)
+    most = int(sys.argv[2]) if len(sys.argv) == 3 else 2
+    print(f"Wrote {build(sys.argv[1], most)} pools to {sys.argv[1]}")
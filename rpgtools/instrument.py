@@ -0,0 +1,215 @@
+"""Counters and timers for generation and dice rolling.
+
+While recording, every Character/Adventure _choose() (per attribute), JSON
+lookup and dice evaluation is counted and timed. bulk() skips _choose(), so
+it's timed per call, along with each (setting, race, gender) group its
+columns are drawn for:
+
+    from rpgtools import instrument
+    with instrument.recording(trace=True) as rec:
+        Character.bulk(1000)
+    print(rec.summary())
+    rec.write_trace("trace.json")   # open in chrome://tracing or Perfetto
+
+Setting RPGTOOLS_INSTRUMENT records the whole run: "1" prints a summary to
+stderr at exit, anything else is a path to write a Chrome trace to.
+
+Timing wrappers are only installed while recording and removed afterwards,
+so the hot paths run their original, unwrapped code the rest of the time.
+Only the recording process is covered: work done in worker processes, e.g.
+by generate_many() with workers > 1, isn't counted.
+"""
+
+from contextlib import contextmanager
+from functools import wraps
+import atexit
+import importlib
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+
+# (module, class or None, attribute, category) for every timed function
+HOOKS = (
+    ("rpgtools", "Character", "_choose", "choose"),
+    ("rpgtools", "Adventure", "_choose", "choose"),
+    ("rpgtools", None, "_extract", "json"),
+    ("rpgtools", "SettingData", "__getitem__", "json"),
+    ("rpgtools", "Character", "bulk", "bulk"),
+    ("rpgtools", None, "_bulk_groups", "bulk"),
+    ("rpgtools.dnd", "Roll", "__init__", "dice"),
+    ("rpgtools.dnd", "Roll", "sample_many", "dice"),
+    ("rpgtools.dnd.expression", "Expression", "roll", "dice"),
+    ("rpgtools.dnd.expression", "Expression", "sample", "dice"),
+    ("rpgtools.gsys", "Roll", "__init__", "dice"),
+    ("rpgtools.gsys", "Roll", "batch", "dice"),
+    ("rpgtools.gsys", "Roll", "distribution", "dice"),
+)
+
+_active = None
+_originals = []
+
+
+class Recorder:
+    """Collects call counts, total times and optionally trace events."""
+
+    def __init__(self, trace=False):
+        self.stats = {}
+        self.events = [] if trace else None
+        self._epoch = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def _add(self, name, category, start, end):
+        with self._lock:
+            self._record(name, category, start, end)
+
+    def _record(self, name, category, start, end):
+        entry = self.stats.get(name)
+        if entry is None:
+            self.stats[name] = [1, end - start]
+        else:
+            entry[0] += 1
+            entry[1] += end - start
+        if self.events is not None:
+            self.events.append({"name": name,
+                                "cat": category,
+                                "ph": "X",
+                                "ts": (start - self._epoch)/1000,
+                                "dur": (end - start)/1000,
+                                "pid": os.getpid(),
+                                "tid": threading.get_ident()})
+
+    def summary(self):
+        """Return a table of calls and times, slowest total first."""
+        out = [f"{'name':40} {'calls':>10} {'total ms':>12} {'mean us':>10}"]
+        for (name, (calls, total)) in sorted(self.stats.items(),
+                                             key=lambda item: -item[1][1]):
+            out.append(f"{name:40} {calls:10} {total/1e6:12.3f}"
+                       + f" {total/calls/1e3:10.3f}")
+        return "\n".join(out)
+
+    def write_trace(self, path):
+        """Write recorded events as a Chrome trace file."""
+        if self.events is None:
+            raise ValueError("Start recording with trace=True to write a trace!")
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+
+def _timed(func, name, category):
+    # Each call records into the Recorder active when it started, so calls
+    # still running in other threads when recording stops are safe
+    if category == "choose":
+        # Time each attribute separately: _choose(self, item, args, rng)
+        @wraps(func)
+        def wrapper(self, item, *args, **kwargs):
+            recorder = _active
+            if recorder is None:
+                return func(self, item, *args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(self, item, *args, **kwargs)
+            finally:
+                recorder._add(f"{name}[{item}]", category, start,
+                              time.perf_counter_ns())
+    elif inspect.isgeneratorfunction(func):
+        # Time each item the generator produces, not the caller's work
+        # between items
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _active
+            items = func(*args, **kwargs)
+            if recorder is None:
+                return (yield from items)
+            while True:
+                start = time.perf_counter_ns()
+                try:
+                    item = next(items)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    recorder._add(name, category, start, time.perf_counter_ns())
+                yield item
+    else:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _active
+            if recorder is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder._add(name, category, start, time.perf_counter_ns())
+    return wrapper
+
+
+def _install():
+    for (module, cls, attr, category) in HOOKS:
+        owner = importlib.import_module(module)
+        if cls is not None:
+            owner = getattr(owner, cls)
+        original = owner.__dict__[attr] if cls else getattr(owner, attr)
+        name = f"{cls}.{attr}" if cls else attr
+        if module != "rpgtools":
+            # e.g. dnd.Roll.__init__, to tell it from gsys.Roll.__init__
+            name = f"{module[len('rpgtools.'):]}.{name}"
+        if isinstance(original, (staticmethod, classmethod)):
+            patched = type(original)(_timed(original.__func__, name, category))
+        else:
+            patched = _timed(original, name, category)
+        setattr(owner, attr, patched)
+        _originals.append((owner, attr, original))
+
+
+def _uninstall():
+    while _originals:
+        (owner, attr, original) = _originals.pop()
+        setattr(owner, attr, original)
+
+
+def start(trace=False):
+    """Start recording and return the Recorder."""
+    global _active
+    if _active is not None:
+        raise RuntimeError("Instrumentation is already recording!")
+    _active = Recorder(trace)
+    _install()
+    return _active
+
+
+def stop():
+    """Stop recording and return the Recorder."""
+    global _active
+    recorder = _active
+    if recorder is None:
+        raise RuntimeError("Instrumentation isn't recording!")
+    _uninstall()
+    _active = None
+    return recorder
+
+
+@contextmanager
+def recording(trace=False):
+    """Record everything run inside the with block."""
+    recorder = start(trace)
+    try:
+        yield recorder
+    finally:
+        stop()
+
+
+def _start_from_env(value):
+    recorder = start(trace=value != "1")
+
+    def report():
+        if _active is recorder:
+            stop()
+        if value == "1":
+            print(recorder.summary(), file=sys.stderr)
+        else:
+            recorder.write_trace(value)
+
+    atexit.register(report)
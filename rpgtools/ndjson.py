@@ -0,0 +1,122 @@
+"""Stream characters to and from newline-delimited JSON files.
+
+Each line holds one character's attributes, as Character.save() writes them,
+plus a "_type" key naming its class so Character and DndCharacter records can
+share a file. Paths ending in ".gz" are gzipped; file objects opened in text
+mode can be passed instead of paths.
+
+    with Writer("town.ndjson.gz") as out:
+        for npc in Character.bulk(1000000):
+            out.write(npc)
+
+    for npc in read("town.ndjson.gz"):
+        ...
+"""
+
+import gzip
+import importlib
+import json
+
+from rpgtools import Character
+
+_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+
+def _open(target, mode, compress):
+    if compress is None:
+        compress = str(target).endswith(".gz")
+    if compress:
+        return gzip.open(target, mode + "t", encoding="utf-8")
+    return open(target, mode, encoding="utf-8")
+
+
+def type_name(cls):
+    """Return the "_type" tag written for instances of cls."""
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _find_type(tag, default):
+    """Return the Character subclass named by a "_type" tag."""
+    if tag is None:
+        return default
+    (module, _, name) = tag.rpartition(".")
+    # Only import our own modules, never whatever a data file names
+    if module != "rpgtools" and not module.startswith("rpgtools."):
+        raise ValueError(f"Unknown character type {tag}!")
+    cls = getattr(importlib.import_module(module), name, None)
+    if not (isinstance(cls, type) and issubclass(cls, Character)):
+        raise ValueError(f"Unknown character type {tag}!")
+    return cls
+
+
+def dumps(obj):
+    """Return obj's line, newline included, as Writer writes it.
+
+    Works for anything with _attrs(), such as adventures, though only
+    characters can be read back."""
+    record = {"_type": type_name(type(obj))}
+    record.update(obj._attrs())
+    return _encoder.encode(record) + "\n"
+
+
+class Writer:
+    """Write characters one per line to a path or text file object."""
+
+    def __init__(self, target, compress=None):
+        if hasattr(target, "write"):
+            self._file = target
+            self._owned = False
+        else:
+            self._file = _open(target, "w", compress)
+            self._owned = True
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, character):
+        self._file.write(dumps(character))
+        self.count += 1
+
+    def write_many(self, characters):
+        for character in characters:
+            self.write(character)
+
+    def close(self):
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+def write(characters, target, compress=None):
+    """Write an iterable of characters and return how many were written."""
+    with Writer(target, compress) as out:
+        out.write_many(characters)
+        return out.count
+
+
+def read(source, cls=Character, compress=None):
+    """Lazily yield characters from a path or text file object.
+
+    Lines without a "_type" key are loaded as cls."""
+    if hasattr(source, "read"):
+        yield from _read_lines(source, cls)
+    else:
+        with _open(source, "r", compress) as f:
+            yield from _read_lines(f, cls)
+
+
+def _read_lines(lines, cls):
+    types = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        tag = record.pop("_type", None)
+        if tag not in types:
+            types[tag] = _find_type(tag, cls)
+        yield types[tag]._from_attrs(record, {})
@@ -0,0 +1,362 @@
+"""An asyncio service for dice rolls, odds and generation.
+
+Clients connect over TCP and send one JSON request per line; each gets one
+JSON response line carrying the same "id". Responses to a connection can
+arrive out of order, so clients should match them up by id.
+
+    {"id": 1, "op": "roll", "expr": "2d6+3"}
+    -> {"id": 1, "result": {"total": 11, "rolls": [4, 4]}}
+    {"id": 2, "op": "odds", "pool": "ppaadd"}
+    -> {"id": 2, "result": 53.42}
+
+Ops:
+    roll: dnd.Roll.from_string(expr)
+    gsys: gsys.Roll(pool)
+    odds: gsys.Roll.probability(pool)
+    character, dnd_character, adventure: generate n (default 1); any
+        other fields are passed as attributes, e.g. "setting": "fantasy"
+
+Requests arriving together are gathered into small batches. Characters
+and adventures with the same attributes are generated together, and heavy
+work (odds for big pools, big rolls, large generation requests, and any
+generation past HEAVY_COUNT entities in one batch) runs in a process pool so
+the event loop stays responsive. Rolls of more than MAX_ROLL dice and pools
+of more than MAX_POOL dice are refused, as is generating more than MAX_COUNT
+entities in one request. Errors come back as {"id", "error"}.
+
+Each connection may have MAX_PENDING requests in flight; past that, the
+server stops reading from it until some are answered. Lines longer than
+MAX_LINE get an error and end the connection.
+
+Run with:
+    python -m rpgtools.server [port]
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import json
+import sys
+
+from rpgtools import Adventure, Character, dnd, gsys
+
+# Odds for pools with more dice than HEAVY_DICE, rolls of more than
+# HEAVY_ROLL dice, and generation of more than HEAVY_COUNT entities, go to
+# the worker pool
+HEAVY_DICE = 8
+HEAVY_ROLL = 1000
+HEAVY_COUNT = 200
+# Requests for more dice than these are refused outright; exact odds for
+# bigger pools take seconds to minutes, even in a worker
+MAX_POOL = 20
+MAX_ROLL = 100000
+MAX_COUNT = 10000
+MAX_LINE = 1 << 16
+# Each connection has at most MAX_PENDING requests in flight, and at most
+# MAX_QUEUED wait for a batch; past these, reading waits for the server
+MAX_PENDING = 256
+MAX_QUEUED = 4096
+
+
+def _roll_dice(expr):
+    """Return how many dice rolling expr takes, refusing more than MAX_ROLL."""
+    dice = sum(term.num*(2 if term.best else 1)*(2 if term.reroll else 1)
+               for term in dnd.compile_expression(expr).terms)
+    if dice > MAX_ROLL:
+        raise ValueError(f"Can't roll more than {MAX_ROLL} dice!")
+    return dice
+
+
+def _pool(pool):
+    """Return the standardized gsys pool, refusing more than MAX_POOL dice."""
+    pool = gsys.Roll.standardize_input(pool)
+    if len(pool) > MAX_POOL:
+        raise ValueError(f"Pools can't have more than {MAX_POOL} dice!")
+    return pool
+
+
+def _roll(request):
+    _roll_dice(request["expr"])
+    roll = dnd.Roll.from_string(request["expr"])
+    return {"total": int(roll), "rolls": roll.rolls}
+
+
+def _gsys(request):
+    roll = gsys.Roll(_pool(request["pool"]))
+    return {"success": roll.success,
+            "advantage": roll.advantage,
+            "triumph": roll.triumph,
+            "despair": roll.despair}
+
+
+def _odds(request):
+    return gsys.Roll.probability(_pool(request["pool"]))
+
+
+def _count(request):
+    """Return how many entities request asks for, refusing more than
+    MAX_COUNT."""
+    n = request.get("n", 1)
+    if not isinstance(n, int) or isinstance(n, bool) or n < 1:
+        raise ValueError("n must be a positive integer!")
+    if n > MAX_COUNT:
+        raise ValueError(f"Can't generate more than {MAX_COUNT} at once!")
+    return n
+
+
+def _attrs(request):
+    return {key: val for (key, val) in request.items()
+            if key not in ("id", "op", "n")}
+
+
+def _generate(request):
+    return _generate_group(request["op"], _attrs(request), _count(request))
+
+
+def _generate_group(op, attrs, n):
+    """Generate n entities for op. Grouped requests were each checked
+    against MAX_COUNT already, so n isn't."""
+    if op == "adventure":
+        return [Adventure(**attrs)._attrs() for i in range(n)]
+    cls = dnd.DndCharacter if op == "dnd_character" else Character
+    return [c._attrs() for c in cls.bulk(n, **attrs)]
+
+
+OPS = {
+    "roll": _roll,
+    "gsys": _gsys,
+    "odds": _odds,
+    "character": _generate,
+    "dnd_character": _generate,
+    "adventure": _generate,
+}
+
+
+def _run(request):
+    """Answer one request. Runs in worker processes for heavy requests."""
+    if request.get("op") not in OPS:
+        raise ValueError(f"Unknown op {request.get('op')}!")
+    return OPS[request["op"]](request)
+
+
+def _is_heavy(request):
+    if request["op"] == "odds":
+        return len(_pool(request["pool"])) > HEAVY_DICE
+    if request["op"] == "roll":
+        return _roll_dice(request["expr"]) > HEAVY_ROLL
+    if request["op"] in ("character", "dnd_character", "adventure"):
+        return _count(request) > HEAVY_COUNT
+    return False
+
+
+class Server:
+    """Serve requests on host:port, gathering up to max_batch requests that
+    arrive within max_delay seconds of each other into one batch."""
+
+    def __init__(self, host="127.0.0.1", port=8765, workers=None,
+                 max_batch=64, max_delay=0.002):
+        self.host = host
+        self.port = port
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._workers = workers
+        self._pool = None
+        self._server = None
+        self._queue = None
+        self._batcher = None
+        self._handlers = {}
+
+    async def start(self):
+        self._queue = asyncio.Queue(MAX_QUEUED)
+        self._pool = ProcessPoolExecutor(self._workers)
+        self._batcher = asyncio.create_task(self._batches())
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, limit=MAX_LINE)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        # Hang up on open connections and let their handlers finish
+        for writer in self._handlers.values():
+            writer.transport.abort()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+        self._batcher.cancel()
+        self._pool.shutdown(cancel_futures=True)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def submit(self, request):
+        """Queue a request dict and return its result."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, future))
+        return await future
+
+    async def _handle(self, reader, writer):
+        self._handlers[asyncio.current_task()] = writer
+        pending = set()
+        slots = asyncio.Semaphore(MAX_PENDING)
+
+        async def reply(response):
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+
+        async def answer(line):
+            request = None
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Requests must be JSON objects!")
+                response = {"id": request.get("id"),
+                            "result": await self.submit(request)}
+            except Exception as e:
+                response = {"id": request.get("id") if isinstance(request, dict)
+                            else None, "error": str(e)}
+            finally:
+                slots.release()
+            await reply(response)
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # The line overran MAX_LINE; the rest of the stream
+                    # can't be split into requests, so stop reading
+                    await reply({"id": None, "error": "Requests can't be "
+                                 f"longer than {MAX_LINE} bytes!"})
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    await slots.acquire()
+                    task = asyncio.create_task(answer(line))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            del self._handlers[asyncio.current_task()]
+
+    async def _batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(),
+                                                        timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                # Never let one bad batch stop the batcher
+                for (request, future) in batch:
+                    _fail(future, e)
+
+    def _run_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        # Small generation requests with the same attributes share one bulk()
+        groups = {}
+        for (request, future) in batch:
+            try:
+                if request.get("op") not in OPS:
+                    raise ValueError(f"Unknown op {request.get('op')}!")
+                if _is_heavy(request):
+                    work = loop.run_in_executor(self._pool, _run, request)
+                    asyncio.ensure_future(work).add_done_callback(
+                        lambda done, future=future: _resolve(future, done))
+                elif request["op"] in ("character", "dnd_character", "adventure"):
+                    key = (request["op"], json.dumps(_attrs(request),
+                                                     sort_keys=True))
+                    groups.setdefault(key, []).append((request, future))
+                else:
+                    result = _run(request)
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                _fail(future, e)
+        # At most HEAVY_COUNT entities are generated inline per batch; groups
+        # past that go to the worker pool like a single heavy request
+        inline = 0
+        for ((op, attrs), members) in groups.items():
+            counts = [_count(request) for (request, future) in members]
+            attrs, total = json.loads(attrs), sum(counts)
+            if inline + total > HEAVY_COUNT:
+                work = loop.run_in_executor(self._pool, _generate_group,
+                                            op, attrs, total)
+                asyncio.ensure_future(work).add_done_callback(
+                    lambda done, members=members, counts=counts:
+                        _resolve_group(members, counts, done))
+                continue
+            inline += total
+            try:
+                results = _generate_group(op, attrs, total)
+            except Exception as e:
+                for (request, future) in members:
+                    _fail(future, e)
+                continue
+            _split(members, counts, results)
+
+
+def _split(members, counts, results):
+    """Hand each grouped request its slice of the group's results."""
+    start = 0
+    for ((request, future), n) in zip(members, counts):
+        if not future.done():
+            future.set_result(results[start:start + n])
+        start += n
+
+
+def _fail(future, error):
+    if not future.done():
+        future.set_exception(error)
+
+
+def _resolve(future, done):
+    if future.done():
+        return
+    if done.cancelled():
+        future.cancel()
+    elif done.exception() is not None:
+        future.set_exception(done.exception())
+    else:
+        future.set_result(done.result())
+
+
+def _resolve_group(members, counts, done):
+    if done.cancelled() or done.exception() is not None:
+        for (request, future) in members:
+            _resolve(future, done)
+    else:
+        _split(members, counts, done.result())
+
+
+async def serve(host="127.0.0.1", port=8765, workers=None):
+    """Run a Server until cancelled."""
+    async with Server(host, port, workers) as server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        print("Usage: python -m rpgtools.server [port]")
+        sys.exit(1)
+    asyncio.run(serve(port=int(sys.argv[1]) if len(sys.argv) == 2 else 8765))
@@ -0,0 +1,203 @@
+"""Keep generated characters and adventures in a local SQLite database.
+
+    with Store("campaign.db") as store:
+        store.add_characters(Character.bulk(10000))
+        store.add_adventures(Adventure.generate_many(100))
+        for npc in store.characters(race="dwarf", name="Thorin"):
+            ...
+
+Each entity is stored once: identical characters or adventures are only
+inserted the first time. Searchable attributes have their own indexed
+columns; everything else is kept as JSON and only turned back into a
+Character, DndCharacter or Adventure as query results are iterated.
+"""
+
+import hashlib
+import json
+import sqlite3
+
+from rpgtools import Adventure, Character
+from rpgtools.ndjson import _find_type, type_name
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS characters (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    type TEXT NOT NULL,
+    setting TEXT,
+    race TEXT,
+    gender TEXT,
+    name TEXT,
+    surname TEXT,
+    age INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS characters_setting ON characters (setting);
+CREATE INDEX IF NOT EXISTS characters_race ON characters (race);
+CREATE INDEX IF NOT EXISTS characters_name ON characters (name, surname);
+CREATE TABLE IF NOT EXISTS adventures (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    adv_type TEXT,
+    title TEXT,
+    locale TEXT,
+    quest_giver INTEGER REFERENCES characters (id),
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS adventures_adv_type ON adventures (adv_type);
+CREATE INDEX IF NOT EXISTS adventures_title ON adventures (title);
+"""
+# Columns which can be searched on, besides type
+CHARACTER_COLUMNS = ("setting", "race", "gender", "name", "surname", "age")
+ADVENTURE_COLUMNS = ("adv_type", "title", "locale")
+
+_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+
+def _key(tag, data):
+    """Return the deduplication key for an entity's JSON."""
+    return hashlib.blake2b(f"{tag}\n{data}".encode(),
+                           digest_size=16).hexdigest()
+
+
+def _character_row(character):
+    tag = type_name(type(character))
+    attrs = character._attrs()
+    data = _encoder.encode(attrs)
+    return ((_key(tag, data), tag)
+            + tuple(attrs.get(col) for col in CHARACTER_COLUMNS)
+            + (data,))
+
+
+def _adventure_row(adventure):
+    attrs = {key: val for (key, val) in adventure.__dict__.items()
+             if key != "quest_giver"}
+    data = _encoder.encode(attrs)
+    qg_key = _character_row(adventure.quest_giver)[0]
+    # Two adventures differing only in quest giver are different adventures
+    return ((_key(qg_key, data),)
+            + tuple(attrs.get(col) for col in ADVENTURE_COLUMNS)
+            + (qg_key, data))
+
+
+def _where(conditions, columns, prefix=""):
+    for col in conditions:
+        if col not in columns:
+            raise KeyError(f"Can't search by {col}! Try one of {columns}.")
+    if not conditions:
+        return ("", ())
+    return (" WHERE " + " AND ".join(f"{prefix}{col} = ?" for col in conditions),
+            tuple(conditions.values()))
+
+
+class Store:
+    """A SQLite database of characters and adventures at path."""
+
+    def __init__(self, path=":memory:"):
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+        self._types = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    # --- Inserting ---
+    def add_characters(self, characters, batch_size=1000):
+        """Insert characters, batch_size per transaction, skipping any
+        already stored. Returns how many were new."""
+        added = 0
+        sql = ("INSERT OR IGNORE INTO characters (key, type, "
+               + ", ".join(CHARACTER_COLUMNS) + ", data) VALUES ("
+               + ", ".join("?"*(len(CHARACTER_COLUMNS) + 3)) + ")")
+        batch = []
+        for character in characters:
+            batch.append(_character_row(character))
+            if len(batch) == batch_size:
+                added += self._insert(sql, batch)
+                batch = []
+        if batch:
+            added += self._insert(sql, batch)
+        return added
+
+    def add_adventures(self, adventures, batch_size=1000):
+        """Insert adventures and their quest givers, batch_size per
+        transaction, skipping any already stored. Returns how many
+        adventures were new."""
+        added = 0
+        sql = ("INSERT OR IGNORE INTO adventures (key, "
+               + ", ".join(ADVENTURE_COLUMNS) + ", quest_giver, data) VALUES ("
+               + ", ".join("?"*(len(ADVENTURE_COLUMNS) + 1))
+               + ", (SELECT id FROM characters WHERE key = ?), ?)")
+        batch = []
+        for adventure in adventures:
+            batch.append(adventure)
+            if len(batch) == batch_size:
+                added += self._insert_adventures(sql, batch)
+                batch = []
+        if batch:
+            added += self._insert_adventures(sql, batch)
+        return added
+
+    def _insert(self, sql, rows):
+        with self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(sql, rows)
+            return self._conn.total_changes - before
+
+    def _insert_adventures(self, sql, adventures):
+        self.add_characters([adv.quest_giver for adv in adventures])
+        return self._insert(sql, [_adventure_row(adv) for adv in adventures])
+
+    # --- Querying ---
+    def count_characters(self, cls=None, **conditions):
+        """Return how many stored characters match; see characters()."""
+        (where, args) = self._character_where(cls, conditions)
+        return self._conn.execute("SELECT COUNT(*) FROM characters" + where,
+                                  args).fetchone()[0]
+
+    def characters(self, cls=None, **conditions):
+        """Lazily yield stored characters matching every condition.
+
+        Conditions are column=value for any of CHARACTER_COLUMNS; cls
+        limits results to that class."""
+        (where, args) = self._character_where(cls, conditions)
+        cursor = self._conn.execute(
+            "SELECT type, data FROM characters" + where + " ORDER BY id", args)
+        for (tag, data) in cursor:
+            yield self._hydrate(tag, data)
+
+    def _character_where(self, cls, conditions):
+        (where, args) = _where(conditions, CHARACTER_COLUMNS)
+        if cls is not None:
+            where += (" AND" if where else " WHERE") + " type = ?"
+            args += (type_name(cls),)
+        return (where, args)
+
+    def _hydrate(self, tag, data):
+        if tag not in self._types:
+            self._types[tag] = _find_type(tag, Character)
+        return self._types[tag]._from_attrs(json.loads(data), {})
+
+    def count_adventures(self, **conditions):
+        """Return how many stored adventures match; see adventures()."""
+        (where, args) = _where(conditions, ADVENTURE_COLUMNS)
+        return self._conn.execute("SELECT COUNT(*) FROM adventures" + where,
+                                  args).fetchone()[0]
+
+    def adventures(self, **conditions):
+        """Lazily yield stored adventures, with their quest givers,
+        matching every condition on ADVENTURE_COLUMNS."""
+        (where, args) = _where(conditions, ADVENTURE_COLUMNS, "a.")
+        cursor = self._conn.execute(
+            "SELECT a.data, c.type, c.data FROM adventures AS a"
+            + " JOIN characters AS c ON c.id = a.quest_giver"
+            + where + " ORDER BY a.id", args)
+        for (data, tag, qg_data) in cursor:
+            yield Adventure(quest_giver=self._hydrate(tag, qg_data),
+                            **json.loads(data))
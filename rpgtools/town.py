@@ -0,0 +1,177 @@
+"""Towns of generated citizens with indexed population queries.
+
+A Town stores its population in a CharacterBatch rather than as Character
+objects: every text attribute is coded as an index into that column's
+distinct values, so each name, race or fear string is held once however
+many citizens share it. Race, gender, profession and age band are indexed, so
+
+    town = Town(50000, setting="fantasy")
+    town.find(race="dwarf", gender="female", age=(30, 50), fear="spiders")
+
+starts from the smallest matching index entry and checks the remaining
+conditions against the coded columns, never building a Character until a
+match is returned.
+"""
+
+from array import array
+from itertools import chain
+import random
+
+from rpgtools import CHAR_DICT, Character, _BULK_ATTRS, _as_random, _item_seed
+from rpgtools.batch import CharacterBatch
+from rpgtools.dnd import DndCharacter
+
+# Default professions and their relative frequency in a town
+PROFESSIONS = {
+    "farmer": 30,
+    "laborer": 15,
+    "servant": 8,
+    "merchant": 6,
+    "craftsman": 6,
+    "guard": 5,
+    "fisher": 4,
+    "innkeeper": 2,
+    "smith": 2,
+    "carpenter": 2,
+    "baker": 2,
+    "brewer": 2,
+    "tailor": 2,
+    "priest": 1,
+    "scholar": 1,
+    "noble": 1,
+}
+# Columns which get an index, besides age bands
+INDEXED = ("race", "gender", "profession")
+
+
+class Town:
+    """A population of size citizens stored by column.
+
+    Passable arguments:
+        setting: setting every citizen is drawn from; random if not given
+        cls: Character class citizens are returned as, e.g. DndCharacter
+        professions: {profession: relative frequency}, default PROFESSIONS
+        band: width in years of the age bands used to index ages
+        rng: random.Random or numpy Generator to draw from instead of the
+            random module
+    Any other arguments fix that attribute for every citizen, as in
+    Character.bulk()."""
+
+    def __init__(self, size, setting=None, cls=Character,
+                 professions=PROFESSIONS, band=10, rng=None, **fixed):
+        rng = _as_random(rng)
+        if setting is None and issubclass(cls, DndCharacter):
+            setting = "fantasy"
+        elif setting is None:
+            setting = rng.choice(tuple(CHAR_DICT))
+        fixed["setting"] = setting
+        self.setting = setting
+        self.cls = cls
+        self.band = band
+        # Citizens are rebuilt from this, so classes which draw more than
+        # the stored columns (like DndCharacter's stats) stay the same
+        self._seed = rng.getrandbits(64)
+        self._extra = {key: val for (key, val) in fixed.items()
+                       if key not in _BULK_ATTRS}
+        self._size = size
+        self._batch = CharacterBatch.bulk(size, rng=rng, **fixed)
+        self.traits = tuple(self._batch._traits)
+        self._batch.set_column("profession", rng.choices(
+            list(professions), list(professions.values()), k=size))
+
+        self._indexes = {}
+        for attr in INDEXED:
+            self._indexes[attr] = self._index(
+                self._batch._text_column(attr).codes)
+        self._bands = self._index(age//band for age in self._batch._ages)
+
+    @staticmethod
+    def _index(keys):
+        index = {}
+        for (row, key) in enumerate(keys):
+            if key not in index:
+                index[key] = array("I")
+            index[key].append(row)
+        return index
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, row):
+        """Build citizen number row as a cls instance."""
+        if not -self._size <= row < self._size:
+            raise IndexError(f"This town has {self._size} citizens!")
+        row %= self._size
+        attrs = self._batch._row_attrs(row)
+        extra = dict(self._extra)
+        extra["rng"] = random.Random(_item_seed(self._seed, row))
+        citizen = self.cls._from_attrs(attrs, extra)
+        citizen.profession = self._batch._extras["profession"][row]
+        return citizen
+
+    def __iter__(self):
+        return (self[row] for row in range(self._size))
+
+    def column(self, attr):
+        """Return every citizen's value of attr, in row order."""
+        return self._batch.column(attr)
+
+    def counts(self, attr):
+        """Return {value: number of citizens} for race, gender or profession."""
+        if attr not in self._indexes:
+            raise KeyError(f"Towns only count indexed columns {INDEXED}!")
+        values = self._batch._text_column(attr).values
+        return {values[code]: len(rows)
+                for (code, rows) in self._indexes[attr].items()}
+
+    def query(self, **conditions):
+        """Return the sorted rows of citizens matching every condition.
+
+        Conditions are attribute=value, for setting, race, gender, name,
+        surname, profession or a personality trait, or age=years or
+        age=(youngest, oldest)."""
+        # (estimated rows, rows) per indexed condition; the smallest is
+        # scanned and the other conditions checked against its rows
+        candidates = []
+        checks = []
+        ages = None
+        for (attr, value) in conditions.items():
+            if attr == "age":
+                ages = (value, value) if isinstance(value, int) else value
+                rows = [self._bands.get(b, ())
+                        for b in range(ages[0]//self.band,
+                                       ages[1]//self.band + 1)]
+                candidates.append((sum(map(len, rows)), chain(*rows)))
+                continue
+            try:
+                column = self._batch._text_column(attr)
+            except KeyError:
+                raise KeyError(f"Towns can't be queried by {attr}!") from None
+            code = column.find(value)
+            if code is None:
+                return []
+            if attr in self._indexes:
+                rows = self._indexes[attr].get(code, ())
+                candidates.append((len(rows), rows))
+            # Unindexed columns tend to have more distinct values, so check
+            # them first to shrink the rows fastest
+            checks.append((attr in self._indexes, column.codes, code))
+
+        if candidates:
+            rows = min(candidates, key=lambda item: item[0])[1]
+        else:
+            rows = range(self._size)
+        for (indexed, codes, code) in sorted(checks, key=lambda c: c[0]):
+            rows = [row for row in rows if codes[row] == code]
+        if ages is not None:
+            (low, high, column) = (*ages, self._batch._ages)
+            rows = [row for row in rows if low <= column[row] <= high]
+        return sorted(rows)
+
+    def count(self, **conditions):
+        """Return how many citizens match; see query()."""
+        return len(self.query(**conditions))
+
+    def find(self, **conditions):
+        """Return the citizens matching every condition; see query()."""
+        return [self[row] for row in self.query(**conditions)]
@@ -7,6 +7,8 @@ setup(name='rpgtools',
       author='Matt Langhinrichs',
       author_email='mlanghinrichs@gmail.com',
       license='GPL',
-      packages=['rpgtools'],
+      packages=['rpgtools', 'rpgtools.dnd', 'rpgtools.gsys'],
+      extras_require={'numpy': ['numpy']},
+      entry_points={'console_scripts': ['rpgtools = rpgtools.cli:main']},
       zip_safe=False,
       include_package_data=True)
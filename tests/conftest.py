@@ -0,0 +1,10 @@
+import pytest
+
+import rpgtools
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep setting data caches out of the real cache directory."""
+    monkeypatch.setattr(rpgtools, "CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
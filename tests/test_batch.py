@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from rpgtools import Character
+from rpgtools.batch import CharacterBatch
+from rpgtools.dnd import DndCharacter
+from rpgtools.ndjson import dumps
+
+
+def snapshot(batch):
+    """Return everything a batch holds, row by row."""
+    return (len(batch), [dumps(c) for c in batch],
+            {attr: list(column) for (attr, column)
+             in batch._extras.items()}, sorted(batch._traits))
+
+
+@pytest.mark.parametrize("cls", [Character, DndCharacter])
+def test_round_trip(cls):
+    characters = cls.bulk(50, rng=random.Random(3))
+    characters[0].profession = "smith"
+    batch = CharacterBatch.from_characters(characters)
+    assert len(batch) == 50
+    assert ([dumps(c) for c in batch.to_list()]
+            == [dumps(c) for c in characters])
+    assert batch[0].profession == "smith"
+    assert not hasattr(batch[1], "profession")
+    assert batch.column("name") == [c.name for c in characters]
+
+
+def test_bulk():
+    batch = CharacterBatch.bulk(100, rng=random.Random(4), setting="fantasy")
+    assert len(batch) == 100
+    assert set(batch.column("setting")) == {"fantasy"}
+    assert all(isinstance(c, Character) for c in batch)
+
+
+@pytest.mark.parametrize("change", [
+    lambda c: setattr(c, "profession", ["not", "hashable"]),
+    lambda c: c.personality.update(fear=["not", "hashable"]),
+    lambda c: setattr(c, "age", 1 << 20),
+    lambda c: c.proficiencies.append("Juggling"),
+    lambda c: c.stats.pop("cha"),
+])
+def test_rejected_append_leaves_batch_unchanged(change):
+    characters = DndCharacter.bulk(5, rng=random.Random(5))
+    characters[0].profession = "smith"
+    batch = CharacterBatch.from_characters(characters)
+    before = snapshot(batch)
+    bad = DndCharacter(rng=random.Random(6))
+    bad.personality["hope"] = "peace"
+    change(bad)
+    with pytest.raises((TypeError, ValueError, OverflowError)):
+        batch.append(bad)
+    assert snapshot(batch) == before
+    with pytest.raises(TypeError):
+        batch.append(Character())
+    assert snapshot(batch) == before
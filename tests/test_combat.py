@@ -0,0 +1,47 @@
+import pytest
+
+from rpgtools.dnd import DndCharacter
+from rpgtools.dnd.combat import Combatant, simulate
+
+np = pytest.importorskip("numpy")
+
+GOBLIN = Combatant("goblin", 7, 15, 4, "1d6+2", 2)
+OGRE = Combatant("ogre", 59, 11, 6, "2d8+4")
+
+
+def test_same_seed_same_result():
+    a = simulate([OGRE], [GOBLIN]*3, 3000, seed=1, batch_size=1000)
+    b = simulate([OGRE], [GOBLIN]*3, 3000, seed=1, batch_size=1000)
+    assert (a.winners == b.winners).all()
+    assert (a.rounds == b.rounds).all()
+    assert (a.downed == b.downed).all()
+
+
+def test_workers_do_not_change_result():
+    a = simulate([OGRE], [GOBLIN]*3, 3000, seed=2, batch_size=1000)
+    b = simulate([OGRE], [GOBLIN]*3, 3000, seed=2, batch_size=1000,
+                 workers=2)
+    assert (a.winners == b.winners).all()
+    assert (a.rounds == b.rounds).all()
+    assert (a.downed == b.downed).all()
+
+
+def test_lopsided_fight():
+    tank = Combatant("tank", 1000, 30, 20, "10d10")
+    result = simulate([tank], [GOBLIN], 500, seed=3)
+    assert result.win_rate(0) == 1
+    assert result.downed_rate(0) == 0
+    assert result.downed_rate(1) == 1
+    (low, high) = result.win_interval(0)
+    assert low < 1 <= high + 1e-9
+    assert sum(result.rounds_distribution(0).values()) == pytest.approx(1)
+
+
+def test_from_character():
+    hero = DndCharacter(stats=(16, 14, 12, 10, 10, 10), level=5)
+    fighter = Combatant.from_character(hero)
+    assert (fighter.hp, fighter.ac, fighter.attack) == (9 + 4*6, 12, 6)
+    assert fighter.damage == "1d8+3"
+    result = simulate([hero], [GOBLIN], 200, seed=4)
+    assert len(result) == 200
+    assert set(result.winners.tolist()) <= {-1, 0, 1}
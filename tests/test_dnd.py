@@ -0,0 +1,232 @@
+from fractions import Fraction
+from itertools import combinations, product
+import random
+
+import pytest
+
+from rpgtools.dnd import (SKILLS, STATS, DndCharacter, Distribution, Roll,
+                          party_check)
+
+
+def brute_force(num, die, mod=0, dropleast=False):
+    """Enumerate every way num dice can land, as {result: probability}."""
+    counts = {}
+    for rolls in product(range(1, die + 1), repeat=num):
+        rolls = sorted(rolls)[1:] if dropleast else rolls
+        total = sum(rolls) + mod
+        counts[total] = counts.get(total, 0) + 1
+    total = die**num
+    return {result: Fraction(n, total) for (result, n) in counts.items()}
+
+
+def pick(pmf, choose):
+    """Brute force the better or worse of two independent rolls."""
+    out = {}
+    for ((a, p), (b, q)) in product(pmf.items(), repeat=2):
+        out[choose(a, b)] = out.get(choose(a, b), 0) + p*q
+    return out
+
+
+POOLS = [(1, 20, 0), (1, 6, 3), (2, 6, 0), (3, 4, -2), (4, 6, 0), (2, 8, 5),
+         (5, 3, 1)]
+
+
+@pytest.mark.parametrize("num, die, mod", POOLS)
+def test_distribution(num, die, mod):
+    assert Roll.distribution(num, die, mod).pmf == brute_force(num, die, mod)
+
+
+@pytest.mark.parametrize("num, die, mod", POOLS)
+def test_dropleast(num, die, mod):
+    dist = Roll.distribution(num, die, mod, dropleast=True)
+    assert dist.pmf == brute_force(num, die, mod, dropleast=True)
+
+
+@pytest.mark.parametrize("num, die, mod", POOLS)
+def test_advantage_and_disadvantage(num, die, mod):
+    pmf = brute_force(num, die, mod)
+    assert (Roll.distribution(num, die, mod, advantage=True).pmf
+            == pick(pmf, max))
+    assert (Roll.distribution(num, die, mod, disadvantage=True).pmf
+            == pick(pmf, min))
+    # Both cancel out to a normal roll
+    assert (Roll.distribution(num, die, mod, advantage=True,
+                              disadvantage=True).pmf == pmf)
+
+
+def test_dropleast_with_advantage():
+    pmf = brute_force(4, 6, dropleast=True)
+    assert (Roll.distribution(4, 6, dropleast=True, advantage=True).pmf
+            == pick(pmf, max))
+
+
+def test_comparisons():
+    dist = Roll.distribution(1, 20, 5)
+    assert (dist >= 15) == Fraction(11, 20)
+    assert (dist < 6) == 0
+    assert isinstance(dist, Distribution)
+
+
+def expected_skill_mods(c):
+    return {skill: (c.stats[stat] - 10)//2
+            + (c.level - 1)//4 + 2 if skill in c.proficiencies
+            else (c.stats[stat] - 10)//2
+            for (skill, stat) in SKILLS.items()}
+
+
+def fresh(c):
+    """Return the entries of c.mods and c.skill_mods that aren't stale."""
+    return ({key for key in dict.keys(c.mods) if key not in c.mods._stale},
+            {key for key in dict.keys(c.skill_mods)
+             if key not in c.skill_mods._stale})
+
+
+def test_new_character_is_consistent():
+    c = DndCharacter(stats=(10, 12, 14, 8, 16, 18), proficiencies=["Arcana"])
+    assert c.mods == {"str": 0, "dex": 1, "con": 2, "int": -1, "wis": 3,
+                      "cha": 4}
+    assert c.skill_mods == expected_skill_mods(c)
+
+
+def test_stat_change_invalidates_its_skills():
+    c = DndCharacter(stats=(10, 10, 10, 10, 10, 10), proficiencies=[])
+    c.mods.refresh()
+    c.skill_mods.refresh()
+    c.stats["dex"] = 16
+    (mods, skill_mods) = fresh(c)
+    assert mods == set(STATS) - {"dex"}
+    assert skill_mods == {skill for (skill, stat) in SKILLS.items()
+                          if stat != "dex"}
+    assert c.mods["dex"] == 3
+    assert c.skill_mods["Stealth"] == 3
+    assert c.skill_mods == expected_skill_mods(c)
+
+
+def test_set_stats():
+    c = DndCharacter(proficiencies=["Athletics"])
+    c.set_stats(18, 10, 10, 10, 10, 10)
+    assert c.mods["str"] == 4
+    assert c.skill_mods == expected_skill_mods(c)
+
+
+def test_level_invalidates_proficient_skills():
+    c = DndCharacter(level=1, proficiencies=["Arcana", "Stealth"])
+    c.skill_mods.refresh()
+    assert c.prof_mod == 2
+    c.level = 5
+    assert fresh(c)[1] == set()
+    assert c.prof_mod == 3
+    assert c.skill_mods == expected_skill_mods(c)
+
+
+def test_proficiency_changes_invalidate_skills():
+    c = DndCharacter(stats=(10, 10, 10, 10, 10, 10), proficiencies=[])
+    c.skill_mods.refresh()
+    c.proficiencies.append("Arcana")
+    assert fresh(c)[1] == set()
+    assert c.skill_mods["Arcana"] == 2
+    c.skill_mods.refresh()
+    c.proficiencies.remove("Arcana")
+    assert fresh(c)[1] == set()
+    assert c.skill_mods["Arcana"] == 0
+    c.proficiencies = ["History"]
+    assert c.skill_mods == expected_skill_mods(c)
+
+
+def test_bulk_stats():
+    characters = DndCharacter.bulk(200, rng=random.Random(2), level=3)
+    for c in characters:
+        assert set(c.stats) == set(STATS)
+        assert all(3 <= val <= 18 for val in c.stats.values())
+        assert c.prof_mod == 2
+        assert c.skill_mods == expected_skill_mods(c)
+    fixed = DndCharacter.bulk(3, stats={stat: 10 for stat in STATS})
+    assert all(c.mods == dict.fromkeys(STATS, 0) for c in fixed)
+
+
+def test_derived_reads_after_stat_change():
+    c = DndCharacter(stats=(10, 10, 10, 10, 10, 10))
+    c.stats["str"] = 18
+    expected = dict.fromkeys(STATS, 0)
+    expected["str"] = 4
+    assert c.mods == expected
+    assert not c.mods != expected
+    c.stats["str"] = 6
+    assert c.mods.pop("str") == -2
+    c.stats["dex"] = 14
+    assert c.skill_mods.pop("Stealth") == expected_skill_mods(c)["Stealth"]
+    c.stats["wis"] = 16
+    assert c.mods.setdefault("wis") == 3
+    assert dict(c.mods.copy()) == c.mods
+    assert len(c.mods) == 5 and "con" in c.mods
+
+
+def test_stat_dict_changes_notify():
+    c = DndCharacter(stats=(10, 10, 10, 10, 10, 10), proficiencies=[])
+    assert c.stats.pop("str") == 10
+    assert "str" not in c.mods and "Athletics" not in c.skill_mods
+    assert c.stats.setdefault("str", 16) == 16
+    assert c.mods["str"] == 3 and c.skill_mods["Athletics"] == 3
+    (stat, val) = c.stats.popitem()
+    assert stat not in c.mods
+    c.stats.clear()
+    assert c.mods == {} and c.skill_mods == {}
+    str(c)
+    c.stats["dex"] = 14
+    assert c.mods == {"dex": 2}
+    assert c.skill_mods == {"Acrobatics": 2, "Sleight of Hand": 2,
+                            "Stealth": 2}
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"dropleast": True},
+                                    {"advantage": True},
+                                    {"disadvantage": True}])
+@pytest.mark.parametrize("num, die, mod", [(1, 20, 0), (4, 6, 0), (2, 8, 3)])
+def test_sample_many_matches_distribution(num, die, mod, kwargs):
+    np = pytest.importorskip("numpy")
+    if kwargs.get("dropleast") and num < 2:
+        pytest.skip("dropping the lowest of one die leaves nothing")
+    n = 40000
+    sample = Roll.sample_many(num, die, mod, n, rng=np.random.default_rng(1),
+                              **kwargs)
+    dist = Roll.distribution(num, die, mod, **kwargs)
+    mean = float(dist.mean())
+    var = sum(float(p)*(val - mean)**2 for (val, p) in dist.pmf.items())
+    assert len(sample) == n
+    assert set(np.unique(sample).tolist()) <= set(dist.pmf)
+    assert abs(sample.mean() - mean) <= 5*(var/n)**0.5
+
+
+def test_numpy_generator_rng():
+    np = pytest.importorskip("numpy")
+    a = Roll(4, 6, rng=np.random.default_rng(3)).rolls
+    assert a == Roll(4, 6, rng=np.random.default_rng(3)).rolls
+    assert all(1 <= r <= 6 for r in a)
+    one = DndCharacter(rng=np.random.default_rng(4))
+    two = DndCharacter(rng=np.random.default_rng(4))
+    assert str(one) == str(two)
+    assert ([str(c) for c in DndCharacter.bulk(5, rng=np.random.default_rng(5))]
+            == [str(c) for c in DndCharacter.bulk(5,
+                                                  rng=np.random.default_rng(5))])
+    assert (Roll.sample_many(2, 6, 0, 50, rng=np.random.default_rng(6))
+            == Roll.sample_many(2, 6, 0, 50, rng=np.random.default_rng(6))).all()
+
+
+def test_party_check():
+    np = pytest.importorskip("numpy")
+    party = [DndCharacter(stats=(10 + 2*i,)*6, proficiencies=[])
+             for i in range(4)]
+    check = party_check(party, "Stealth", 13, rng=np.random.default_rng(7))
+    d20 = Roll.distribution(1, 20)
+    for (c, p) in zip(party, check.probability):
+        assert p == pytest.approx(float(d20 + c.skill_mods["Stealth"] >= 13))
+    assert (check.success == (check.totals >= 13)).all()
+    # At least half of the four succeed
+    probs = check.probability
+    exact = sum(np.prod([probs[j] if j in wins else 1 - probs[j]
+                         for j in range(4)])
+                for k in range(2, 5) for wins in combinations(range(4), k))
+    assert check.group_probability == pytest.approx(exact)
+    checks = party_check(party, "dex", [5, 15, 25])
+    assert checks.success.shape == (4, 3)
+    assert len(checks.group_probability) == 3
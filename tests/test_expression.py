@@ -0,0 +1,94 @@
+import random
+
+import pytest
+
+from rpgtools.dnd import Roll, compile_expression
+
+
+class Scripted(random.Random):
+    """A Random whose randint() returns the given rolls in order."""
+
+    def __init__(self, rolls):
+        super().__init__(0)
+        self.rolls = list(rolls)
+
+    def randint(self, a, b):
+        roll = self.rolls.pop(0)
+        assert a <= roll <= b
+        return roll
+
+
+@pytest.mark.parametrize("text", ["", "d", "2d", "d6+", "2d6++3", "2x6",
+                                  "0d6", "2d0", "2d6kh3", "2d6dl2", "1d6r6",
+                                  "4d6kh3dl1", "4d6khkl", "1d20advdis",
+                                  "2d6r1r2", "1d20adv adv"])
+def test_malformed(text):
+    with pytest.raises(ValueError):
+        compile_expression(text)
+
+
+@pytest.mark.parametrize("text, rolls, total", [
+    ("4d6kh3", [1, 5, 3, 6], 14),
+    ("4d6kh", [1, 5, 3, 6], 6),
+    ("4d6kl2", [1, 5, 3, 6], 4),
+    ("4d6dh1", [1, 5, 3, 6], 9),
+    ("4d6dl1", [1, 5, 3, 6], 14),
+    ("4d6dl", [2, 2, 3, 6], 11),
+    # Each 1 or 2 is rerolled once, whatever the new roll shows
+    ("3d6r2", [1, 4, 2, 1, 6], 11),
+    ("3d6r", [1, 4, 2, 3], 9),
+    ("d20adv+5", [7, 15], 20),
+    ("d20dis+5", [7, 15], 12),
+    ("2d6adv", [1, 2, 3, 4], 7),
+    ("d%", [87], 87),
+    ("2d%-1d4+3", [50, 60, 4], 109),
+    ("-1d4+10", [3], 7),
+])
+def test_modifiers(text, rolls, total):
+    rng = Scripted(rolls)
+    assert compile_expression(text).roll(rng) == total
+    assert rng.rolls == []
+
+
+def test_percentile_is_d100():
+    assert compile_expression("d%").simple == (1, 100, 0)
+
+
+def test_simple_expressions_use_roll():
+    assert compile_expression("2d6+3").simple == (2, 6, 3)
+    assert compile_expression("2d6-1").simple == (2, 6, -1)
+    roll = Roll.from_string("2d6+3", rng=random.Random(4))
+    expected = Roll(2, 6, 3, rng=random.Random(4))
+    assert roll.rolls == expected.rolls and roll.result == expected.result
+    for text in ("2d6+1d4", "4d6dl1", "d20adv", "-2d6"):
+        assert compile_expression(text).simple is None
+        roll = Roll.from_string(text, rng=random.Random(4))
+        assert roll.rolls == []
+        assert roll.result == compile_expression(text).roll(random.Random(4))
+
+
+def bounds(expr):
+    """Return the lowest and highest totals expr can roll."""
+    (lo, hi) = (expr.mod, expr.mod)
+    for term in expr.terms:
+        kept = term.keep[1] if term.keep else term.num
+        (low, high) = (term.sign*kept, term.sign*kept*term.die)
+        lo += min(low, high)
+        hi += max(low, high)
+    return (lo, hi)
+
+
+@pytest.mark.parametrize("text", ["4d6dl1", "3d8kh2r1+2", "d20adv-1",
+                                  "2d10dis", "1d%-2d4"])
+def test_sample_agrees_with_roll(text):
+    np = pytest.importorskip("numpy")
+    expr = compile_expression(text)
+    n = 20000
+    sample = expr.sample(n, rng=random.Random(5))
+    assert (sample == expr.sample(n, rng=random.Random(5))).all()
+    rng = random.Random(5)
+    rolls = np.array([expr.roll(rng) for i in range(n)])
+    (lo, hi) = bounds(expr)
+    assert lo <= sample.min() and sample.max() <= hi
+    assert lo <= rolls.min() and rolls.max() <= hi
+    assert abs(sample.mean() - rolls.mean()) < 4*np.sqrt(2*rolls.var()/n)
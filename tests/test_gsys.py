@@ -0,0 +1,106 @@
+from fractions import Fraction
+from itertools import product
+import random
+
+import pytest
+
+from rpgtools import gsys
+from rpgtools.gsys import FACE_OUTCOMES, MAX_POOL, Roll, odds
+
+
+def brute_force(string):
+    """Enumerate every way the pool can land."""
+    string = Roll.standardize_input(string)
+    counts = {}
+    for faces in product(*(FACE_OUTCOMES[let] for let in string)):
+        outcome = tuple(map(sum, zip((0, 0, 0, 0), *faces)))
+        counts[outcome] = counts.get(outcome, 0) + 1
+    total = sum(counts.values())
+    return {outcome: Fraction(n, total) for (outcome, n) in counts.items()}
+
+
+@pytest.mark.parametrize("pool", ["", "b", "s", "pc", "ppad", "ygru",
+                                  "acdsb", "ddcss"])
+def test_distribution_matches_brute_force(pool):
+    assert Roll.distribution(pool) == brute_force(pool)
+
+
+def test_probability_matches_brute_force():
+    dist = brute_force("pacd")
+    expected = sum(p for (outcome, p) in dist.items() if outcome[0] > 0)
+    assert Roll.probability("pacd") == round(100*float(expected), 2)
+
+
+@pytest.mark.parametrize("outcome", [(2, 0, 0, 0), (0, 2, 0, 0), (-2, 0, 0, 0),
+                                     (0, -2, 0, 0), (-1, 0, 0, 1)])
+def test_largest_pool_does_not_overflow(outcome):
+    # MAX_POOL dice all showing the most extreme face still unpack correctly
+    key = gsys._pack(outcome)*MAX_POOL
+    assert gsys._unpack(key, MAX_POOL) == tuple(MAX_POOL*val for val in outcome)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_largest_mixed_pool_round_trips(seed):
+    # Any MAX_POOL faces summed in packed form unpack to the summed outcome
+    rng = random.Random(seed)
+    faces = [rng.choice(FACE_OUTCOMES[let])
+             for let in rng.choices("pacdsb", k=MAX_POOL)]
+    key = sum(map(gsys._pack, faces))
+    assert gsys._unpack(key, MAX_POOL) == tuple(map(sum, zip(*faces)))
+
+
+def test_pool_too_large():
+    with pytest.raises(ValueError):
+        Roll.distribution("b"*(MAX_POOL + 1))
+
+
+def test_odds_table(tmp_path):
+    path = str(tmp_path / "odds.bin")
+    assert odds.build(path, 1) == 2**len(odds.DICE)
+    with odds.OddsTable(path) as table:
+        assert table.probability("pacd") == Roll.probability("pacd")
+
+
+def test_odds_table_too_large(tmp_path):
+    path = tmp_path / "odds.bin"
+    path.write_bytes(b"old table")
+    with pytest.raises(ValueError):
+        odds.build(str(path), (0, 0, 0, 0, 64, 0))
+    assert path.read_bytes() == b"old table"
+    assert [p.name for p in tmp_path.iterdir()] == ["odds.bin"]
+
+
+def test_odds_table_largest_storable(tmp_path):
+    # 63 boost dice can all show two advantage and still be stored
+    path = str(tmp_path / "odds.bin")
+    assert odds.build(path, (63, 0, 0, 0, 0, 0)) == 64
+    with odds.OddsTable(path) as table:
+        dist = table.distribution("b"*63)
+    assert max(outcome[1] for outcome in dist) == 126
+    assert sum(dist.values()) == pytest.approx(1)
+
+
+@pytest.mark.parametrize("pool", ["ppaadd", "bsc", "yygruu"])
+def test_batch_matches_distribution(pool):
+    np = pytest.importorskip("numpy")
+    n = 40000
+    batch = Roll.batch(pool, n, rng=np.random.default_rng(1))
+    dist = Roll.distribution(pool)
+    for (i, field) in enumerate(batch):
+        assert len(field) == n
+        mean = sum(float(p)*outcome[i] for (outcome, p) in dist.items())
+        var = sum(float(p)*(outcome[i] - mean)**2
+                  for (outcome, p) in dist.items())
+        assert abs(field.mean() - mean) <= 5*(var/n)**0.5 + 1e-9
+    seen = set(zip(*(field.tolist() for field in batch)))
+    assert seen <= set(dist)
+
+
+def test_batch_is_reproducible():
+    np = pytest.importorskip("numpy")
+    a = Roll.batch("ppaadd", 100, rng=np.random.default_rng(2))
+    b = Roll.batch("ppaadd", 100, rng=np.random.default_rng(2))
+    assert all((x == y).all() for (x, y) in zip(a, b))
+    c = Roll.batch("ppaadd", 100, rng=random.Random(3))
+    d = Roll.batch("ppaadd", 100, rng=random.Random(3))
+    assert all((x == y).all() for (x, y) in zip(c, d))
@@ -0,0 +1,42 @@
+import io
+import random
+
+import pytest
+
+from rpgtools import Character, ndjson
+from rpgtools.dnd import DndCharacter
+
+
+def mixed(n, seed=1):
+    rng = random.Random(seed)
+    return (Character.bulk(n, rng=rng) + DndCharacter.bulk(n, rng=rng)
+            + [DndCharacter(rng=rng, level=7, dnd_class="bard")])
+
+
+@pytest.mark.parametrize("name", ["town.ndjson", "town.ndjson.gz"])
+def test_round_trip(tmp_path, name):
+    characters = mixed(20)
+    path = str(tmp_path / name)
+    assert ndjson.write(characters, path) == len(characters)
+    loaded = list(ndjson.read(path))
+    assert [type(c) for c in loaded] == [type(c) for c in characters]
+    assert ([ndjson.dumps(c) for c in loaded]
+            == [ndjson.dumps(c) for c in characters])
+    assert loaded[-1].skill_mods == characters[-1].skill_mods
+
+
+def test_file_objects():
+    characters = mixed(5)
+    out = io.StringIO()
+    with ndjson.Writer(out) as writer:
+        writer.write_many(characters)
+    out.seek(0)
+    loaded = list(ndjson.read(out))
+    assert ([ndjson.dumps(c) for c in loaded]
+            == [ndjson.dumps(c) for c in characters])
+
+
+def test_unknown_type():
+    line = '{"_type": "os.system", "name": "x"}\n'
+    with pytest.raises(ValueError):
+        list(ndjson.read(io.StringIO(line)))
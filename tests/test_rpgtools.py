@@ -0,0 +1,100 @@
+import json
+import random
+
+import pytest
+
+import rpgtools
+from rpgtools import (Adventure, Character, NameGenerator, Table, cli,
+                      name_generator)
+from rpgtools.dnd import DndCharacter
+from rpgtools.ndjson import dumps
+
+
+def test_bulk_fixes_attributes():
+    characters = Character.bulk(50, rng=random.Random(1), setting="fantasy",
+                                gender="female")
+    assert len(characters) == 50
+    assert all(c.setting == "fantasy" and c.gender == "female"
+               for c in characters)
+
+
+def test_bulk_without_traits():
+    characters = Character.bulk(3, personality={})
+    assert all(isinstance(c, Character) for c in characters)
+    assert [c.personality for c in characters] == [{}, {}, {}]
+    characters[0].personality["fear"] = "spiders"
+    assert characters[1].personality == {}
+
+
+def test_distinct_list_names_are_unchanged():
+    generator = name_generator("steampunk", "human", "female")
+    assert generator.names is not None
+    assert set(generator.distinct()) == set(generator.names)
+    assert "MaryEllis" in set(generator.distinct())
+
+
+def test_distinct_grammar_names_match_calls():
+    generator = NameGenerator("a,b;c,d")
+    assert set(generator.distinct()) == {"Ac", "Ad", "Bc", "Bd"}
+    assert generator() in {"Ac", "Ad", "Bc", "Bd"}
+
+
+def test_adventure_type_fits_request():
+    for seed in range(20):
+        adventure = Adventure(rng=random.Random(seed), num_hours=1,
+                              num_elements=1)
+        assert len(adventure.hours) == 1
+    with pytest.raises(ValueError):
+        Adventure(num_hours=1000)
+
+
+def test_adventure_skips_incomplete_setting_pack(tmp_path):
+    (tmp_path / "adv").mkdir()
+    (tmp_path / "adv" / "empty.json").write_text(json.dumps({"plots": ["x"]}))
+    rpgtools.add_setting_pack(str(tmp_path))
+    try:
+        for seed in range(20):
+            assert Adventure(rng=random.Random(seed)).adv_type != "empty"
+    finally:
+        rpgtools.remove_setting_pack(str(tmp_path))
+    assert "empty" not in rpgtools.ADV_DICT
+
+
+def test_list_from_dict():
+    assert Table.list_from_dict({1: "a"}) == ["a"]
+    assert Table.list_from_dict({}) == []
+    assert (Table.list_from_dict({1: "yadda", (2, 3): "badda", 4: "boo"})
+            == ["yadda", "badda", "badda", "boo"])
+
+
+@pytest.mark.parametrize("cls", [Character, DndCharacter, Adventure])
+def test_generate_many_matches_across_workers(cls):
+    one = [dumps(obj) for obj in cls.generate_many(150, workers=1, seed=7)]
+    two = [dumps(obj) for obj in cls.generate_many(150, workers=2, seed=7)]
+    assert one == two
+    assert len(set(one)) > 100
+
+
+@pytest.mark.parametrize("kind", ["characters", "adventures"])
+def test_cli_output_matches_across_workers(kind, capsys):
+    outputs = []
+    for workers in ("1", "2"):
+        assert cli.main([kind, "150", "--seed", "3", "--workers", workers,
+                         "--chunk", "40"]) == 0
+        outputs.append(capsys.readouterr().out.encode())
+    assert outputs[0] == outputs[1]
+    assert outputs[0].count(b"\n") == 150
+
+
+def test_table_roll_many_matches_weights():
+    np = pytest.importorskip("numpy")
+    table = Table({(1, 10): "a", (11, 15): "b", 16: "c", (17, 20): "a"},
+                  rng=np.random.default_rng(1))
+    n = 40000
+    counts = table.roll_many(n, counts=True)
+    assert sum(counts.values()) == n
+    for (value, weight) in (("a", 14), ("b", 5), ("c", 1)):
+        p = weight/20
+        assert abs(counts[value]/n - p) <= 5*(p*(1 - p)/n)**0.5
+    rolls = table.roll_many(100)
+    assert set(rolls.tolist()) <= {"a", "b", "c"}
@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import pytest
+
+from rpgtools import server
+
+
+def test_cancelled_submit_does_not_stop_batcher():
+    async def main():
+        async with server.Server(port=0, workers=1) as srv:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    srv.submit({"op": "roll", "expr": "1d20"}), 0.0001)
+            await asyncio.sleep(0.01)
+            assert not srv._batcher.done()
+            result = await asyncio.wait_for(
+                srv.submit({"op": "roll", "expr": "1d20"}), 5)
+            assert 1 <= result["total"] <= 20
+    asyncio.run(main())
+
+
+def test_count_too_large():
+    async def main():
+        async with server.Server(port=0, workers=1) as srv:
+            for op in ("character", "dnd_character", "adventure"):
+                with pytest.raises(ValueError):
+                    await srv.submit({"op": op, "n": server.MAX_COUNT + 1})
+            assert len(await srv.submit({"op": "character", "n": 3})) == 3
+    asyncio.run(main())
+
+
+def test_pool_too_large():
+    async def main():
+        async with server.Server(port=0, workers=1) as srv:
+            with pytest.raises(ValueError):
+                await srv.submit({"op": "odds",
+                                  "pool": "p"*(server.MAX_POOL + 1)})
+    asyncio.run(main())
+
+
+def test_line_too_long():
+    async def main():
+        async with server.Server(port=0, workers=1) as srv:
+            (reader, writer) = await asyncio.open_connection(srv.host,
+                                                             srv.port)
+            writer.write(b'{"id": 1, "op": "roll", "expr": "1d4"}\n')
+            writer.write(b"x"*(server.MAX_LINE + 10) + b"\n")
+            await writer.drain()
+            data = await asyncio.wait_for(reader.read(), 5)
+            responses = [json.loads(line) for line in data.splitlines()]
+            writer.close()
+            assert len(responses) == 2
+            assert any(r["id"] is None and "error" in r for r in responses)
+            assert any(r["id"] == 1 and "result" in r for r in responses)
+    asyncio.run(main())
+
+
+def test_pending_requests_are_bounded(monkeypatch):
+    monkeypatch.setattr(server, "MAX_PENDING", 2)
+
+    async def main():
+        async with server.Server(port=0, workers=1) as srv:
+            (reader, writer) = await asyncio.open_connection(srv.host,
+                                                             srv.port)
+            lines = [json.dumps({"id": i, "op": "roll", "expr": "1d6"})
+                     for i in range(20)]
+            writer.write("\n".join(lines).encode() + b"\n")
+            await writer.drain()
+            ids = set()
+            for i in range(20):
+                ids.add(json.loads(await asyncio.wait_for(reader.readline(),
+                                                          5))["id"])
+            writer.close()
+            assert ids == set(range(20))
+    asyncio.run(main())
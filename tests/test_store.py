@@ -0,0 +1,37 @@
+import random
+
+from rpgtools import Adventure, Character
+from rpgtools.dnd import DndCharacter
+from rpgtools.ndjson import dumps
+from rpgtools.store import Store
+
+
+def test_character_round_trip(tmp_path):
+    rng = random.Random(7)
+    characters = Character.bulk(30, rng=rng) + DndCharacter.bulk(10, rng=rng)
+    path = str(tmp_path / "campaign.db")
+    with Store(path) as store:
+        assert store.add_characters(characters, batch_size=7) == 40
+        # Identical characters are only stored once
+        assert store.add_characters(characters[:5]) == 0
+    with Store(path) as store:
+        loaded = list(store.characters())
+        assert [dumps(c) for c in loaded] == [dumps(c) for c in characters]
+        assert store.count_characters(DndCharacter) == 10
+        dwarves = [c for c in characters if c.race == "dwarf"]
+        assert ([dumps(c) for c in store.characters(race="dwarf")]
+                == [dumps(c) for c in dwarves])
+
+
+def test_adventure_round_trip():
+    rng = random.Random(8)
+    adventures = [Adventure(rng=rng) for i in range(5)]
+    with Store() as store:
+        assert store.add_adventures(adventures, batch_size=2) == 5
+        assert store.add_adventures(adventures) == 0
+        loaded = list(store.adventures())
+        assert [dumps(a) for a in loaded] == [dumps(a) for a in adventures]
+        assert store.count_characters() == 5
+        title = adventures[0].title
+        assert ([a.title for a in store.adventures(title=title)]
+                == [a.title for a in adventures if a.title == title])